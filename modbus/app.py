@@ -1,6 +1,15 @@
 import streamlit as st
-from modbus_manager import manager
+from streamlit.errors import StreamlitAPIException
+from modbus_manager import ConnectionManager, backoff_delay, FUNCTION_DISPLAY_LIST, FUNCTION_BY_DISPLAY, DEFAULT_FUNCTION, WRITABLE_TYPES
+import csv
+import inspect
+import io
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
 
 # Optional helper: pip install streamlit-autorefresh
 try:
@@ -12,34 +21,210 @@ st.set_page_config(page_title="Modbus TCP Manager", layout="wide")
 st.title("Modbus TCP Manager")
 
 
-def rerun():
+# 在导入时一次性确定 rerun 实现（新版本 st.rerun，旧版本 st.experimental_rerun）
+_RERUN = getattr(st, "rerun", None) or getattr(st, "experimental_rerun", None)
+
+
+# st.rerun(scope="fragment") (>=1.37) 只重跑当前 fragment
+try:
+    _RERUN_HAS_SCOPE = "scope" in inspect.signature(_RERUN).parameters
+except (TypeError, ValueError):
+    _RERUN_HAS_SCOPE = False
+
+
+def rerun(scope: str = "app"):
+    # 极旧版本两者皆无时不做任何事：下一次交互 / 自动刷新自然会重跑脚本
+    if _RERUN is None:
+        return
+    if scope == "fragment" and _RERUN_HAS_SCOPE:
+        try:
+            _RERUN(scope="fragment")
+        except StreamlitAPIException:
+            # 仅 fragment 重跑期间允许 scope="fragment"；整页运行中退回整页 rerun
+            pass
+    _RERUN()
+
+
+def request_rerun(scope: str = "app"):
+    # 按钮处理函数只登记 rerun 请求，由 flush_rerun() 在面板 / 脚本末尾统一触发一次；
+    # 只影响当前面板的操作登记 "fragment"，同一次运行中的整页请求优先
+    if scope == "app" or "_needs_rerun" not in st.session_state:
+        st.session_state["_needs_rerun"] = scope
+
+
+def flush_rerun():
+    scope = st.session_state.pop("_needs_rerun", None)
+    if scope is not None:
+        rerun(scope)
+
+
+# st.fragment (>=1.37) / st.experimental_fragment (>=1.33)；旧版本退化为普通函数
+_FRAGMENT = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+_fragment = _FRAGMENT or (lambda fn: fn)
+
+
+def _fragment_every(seconds: float):
+    # 定时重跑的 fragment（run_every）；旧版本退化为普通函数，由 streamlit-autorefresh 整页刷新
+    if _FRAGMENT is None:
+        return lambda fn: fn
+    return _FRAGMENT(run_every=seconds)
+
+
+# 较新的 Streamlit 支持 st.cache_resource(on_release=...)：缓存条目被丢弃时回调
+try:
+    _CACHE_HAS_ON_RELEASE = "on_release" in inspect.signature(st.cache_resource.__call__).parameters
+except (TypeError, ValueError):
+    _CACHE_HAS_ON_RELEASE = False
+
+
+# ---------- 辅助函数 ----------
+@st.cache_resource(show_spinner=False, **({"on_release": ConnectionManager.close_all} if _CACHE_HAS_ON_RELEASE else {}))
+def get_manager() -> ConnectionManager:
+    # 进程级唯一的连接管理器：跨 rerun / 会话共享，模块被重新加载时已建立的连接仍保留；
+    # 支持 on_release 时，菜单中的 "Clear cache" 会先关闭旧管理器的全部连接与轮询线程再重新创建，可用于恢复卡死的连接
+    return ConnectionManager()
+
+
+manager = get_manager()
+
+
+@st.cache_resource(show_spinner=False)
+def _io_pool():
+    # 进程级共享线程池，用于并发执行阻塞的 Modbus 读写
+    return ThreadPoolExecutor(max_workers=32, thread_name_prefix="modbus-io")
+
+
+def do_read_group(jobs):
+    """
+    在工作线程中对同一设备（host/port/unit）、同一功能的多个连接合并读取：
+    地址区间由 read_many 合并为尽量少的连续请求，再按各连接的区间切回。
+    返回 (是否成功, 与 jobs 一一对应的值列表 或 异常)；不访问 st.session_state。
+    """
+    conn_meta, func_type = jobs[0][1], jobs[0][2]
     try:
-        if hasattr(st, "experimental_rerun"):
-            st.experimental_rerun()
-            return
-    except Exception:
-        # best-effort rerun fallback
+        ranges = [(address, count) for _, _, _, address, count, _ in jobs]
+        return True, conn_meta.read_many(type=func_type, ranges=ranges, allow_reconnect=True)
+    except Exception as e:
+        return False, e
+
+
+AUTO_CONNECT_ATTEMPTS = 5  # 新建 / 克隆连接后自动连接的最大尝试次数
+AUTO_CONNECT_BACKOFF_S = 0.5  # 第 n 次失败后等待约 AUTO_CONNECT_BACKOFF_S * 2^(n-1) 秒（有上限并加随机抖动）再重试
+
+
+def auto_connect(conn_meta) -> bool:
+    """
+    在工作线程中自动连接，最多尝试 AUTO_CONNECT_ATTEMPTS 次，返回是否连接成功；不访问 st.session_state。
+    """
+    for attempt in range(1, AUTO_CONNECT_ATTEMPTS + 1):
+        # 重试期间连接可能已被删除：不再连接；刚连上时被删除则关闭，避免泄漏套接字
+        if manager.get(conn_meta.id) is None:
+            return False
         try:
-            params = dict(st.experimental_get_query_params())
-            params["_rerun"] = [str(time.time())]
-            st.experimental_set_query_params(**params)
+            if conn_meta.connect():
+                if manager.get(conn_meta.id) is None:
+                    conn_meta.close()
+                    return False
+                return True
         except Exception:
-            st.session_state["_rerun_flag"] = time.time()
+            pass
+        if attempt < AUTO_CONNECT_ATTEMPTS:
+            # 指数退避 + 随机抖动：同一设备故障恢复时，多个连接不会同时集中重连
+            time.sleep(backoff_delay(attempt, AUTO_CONNECT_BACKOFF_S))
+    return False
+
+
+@st.cache_resource(show_spinner=False)
+def _connects_in_flight() -> dict:
+    # (host, port) -> 进行中的自动连接 Future，跨会话共享
+    return {}
+
+
+def start_auto_connect(conn_meta):
+    # 重试等待在线程池中进行，表单 / 按钮立即返回；结果由 harvest_connects() 在之后的 rerun 中收取。
+    # 同一 (host, port) 的连接共用一个 TCP 客户端，因此同一时间只跑一个重试循环，其余克隆等待同一个 Future
+    st.session_state.pop(panel_keys(conn_meta.id).conn_failed, None)
+    in_flight = _connects_in_flight()
+    endpoint = (conn_meta.host, conn_meta.port)
+    fut = in_flight.get(endpoint)
+    if fut is None or fut.done():
+        fut = in_flight[endpoint] = _io_pool().submit(auto_connect, conn_meta)
+    st.session_state["_connect_futures"][conn_meta.id] = fut
+
+
+def harvest_connects() -> bool:
+    # 返回本次是否收取到任何结果
+    futures = st.session_state["_connect_futures"]
+    harvested = False
+    for cid, fut in list(futures.items()):
+        if not fut.done():
+            continue
+        del futures[cid]
+        harvested = True
+        conn_meta = manager.get(cid)
+        ok = fut.result()
+        if ok and conn_meta is not None and not conn_meta.connected:
+            # 共享的重试循环由同一地址的其它连接完成：接入已打开的客户端，无需重新建立 TCP 连接
+            try:
+                ok = conn_meta.connect()
+            except Exception:
+                ok = False
+        if ok:
+            st.session_state.pop(panel_keys(cid).conn_failed, None)
+        else:
+            st.session_state[panel_keys(cid).conn_failed] = True
+    return harvested
 
 
-def ensure_session_default(key: str, default):
-    if key not in st.session_state:
-        st.session_state[key] = default
+def set_write_flag(write_flag_key: str, value: bool):
+    # 按钮 on_click 回调：在本次 rerun 开始前切换批量写入表单的显示状态，无需再额外 rerun
+    st.session_state[write_flag_key] = value
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cached_list(version: int):
+    """
+    按 manager.version 缓存连接列表及 id -> 连接字典 的映射，仅在新增/删除连接后重新构建。
+    使用 cache_resource 直接返回同一对象，避免 cache_data 每次命中都反序列化出一份副本；调用方只读不改。
+    注意：缓存中的 "connected" 字段可能过期，实时状态请通过连接对象的 connected 属性获取。
+    """
+    conns = manager.list_connections()
+    return conns, {c["id"]: c for c in conns}
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _conn_labels(version: int):
+    """
+    按 manager.version 缓存连接 id 列表（保持创建顺序）及 id -> 显示名称 的映射。
+    """
+    conns, _ = _cached_list(version)
+    ids = [c["id"] for c in conns]
+    labels = {c["id"]: c.get("name") or f'{c.get("host")}:{c.get("port")}' for c in conns}
+    return ids, labels
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _conn_objects(version: int):
+    """
+    按 manager.version 缓存 id -> ModbusConnection 对象，脚本中统一通过它查找连接，
+    新增/删除连接后 version 变化即自动失效。
+    """
+    _, conn_map = _cached_list(version)
+    conns = {}
+    for cid in conn_map:
+        conn = manager.get(cid)
+        if conn is not None:
+            conns[cid] = conn
+    return conns
 
 
-# ---------- 辅助函数 ----------
 def find_existing_connection(host: str, port: int, unit: int):
     """
     在 manager.list_connections() 中查找是否存在相同 host/port/unit 的连接。
     返回匹配的连接字典（第一个匹配项），如果没有则返回 None。
     """
     try:
-        conns = manager.list_connections()
+        conns, _ = _cached_list(manager.version)
     except Exception:
         return None
 
@@ -63,13 +248,134 @@ def plc_to_modbus(plc_addr: int, base: int) -> int:
     return plc_addr
 
 
+def parse_int_tokens(tokens) -> np.ndarray:
+    """
+    将批量写入的文本值解析为整数数组。
+    纯十进制时由 NumPy 在 C 层一次性转换；含 0x 等其它写法时退回逐个 int(token, 0)。
+    """
+    try:
+        return np.asarray(tokens).astype(np.int64)
+    except (ValueError, OverflowError):
+        return np.array([int(token, 0) for token in tokens], dtype=np.int64)
+
+
+_BATCH_SEP = re.compile(r"[,\s]+")
+_BATCH_SEP_CHARS = ", \t\r\n"
+_COIL_FALSE_TOKENS = np.array(["0", "False", "false", "off", "OFF"])
+
+
+def parse_batch_values(raw: str, func_type: str, count: int) -> list:
+    """
+    解析批量写入文本（逗号和/或空白分隔）：一次正则切分后由 NumPy 整体转换，
+    线圈值为假值记号时为 0、否则为 1；结果按 count 截断或补 0，返回整数列表。
+    """
+    tokens = np.array(_BATCH_SEP.split(raw.strip(_BATCH_SEP_CHARS)))
+    if func_type == "coils":
+        arr = (~np.isin(tokens, _COIL_FALSE_TOKENS)).astype(np.int64)
+    else:
+        arr = parse_int_tokens(tokens)
+    arr = arr[:count]
+    if arr.size < count:
+        arr = np.pad(arr, (0, count - arr.size))
+    return arr.tolist()
+
+
+def contiguous_runs(indexes: np.ndarray) -> list:
+    """
+    将递增的下标数组拆分为连续区间 [(起始, 结束(不含)), ...]，用于把相邻修改合并为一次多值写入（FC15/FC16）。
+    """
+    if not indexes.size:
+        return []
+    breaks = np.flatnonzero(np.diff(indexes) != 1) + 1
+    return [(int(run[0]), int(run[-1]) + 1) for run in np.split(indexes, breaks)]
+
+
+def values_to_csv(values, plc_start, modbus_start) -> bytes:
+    """
+    将读取结果导出为 CSV（PLC 地址, Modbus 地址, 值），仅在用户勾选导出时生成。
+    """
+    plc_start = plc_start if plc_start is not None else 0
+    modbus_start = modbus_start if modbus_start is not None else 0
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["PLC 地址", "Modbus 地址", "值"])
+    n = len(values)
+    writer.writerows(zip(range(plc_start, plc_start + n), range(modbus_start, modbus_start + n), values))
+    return buf.getvalue().encode("utf-8-sig")
+
+
+def to_value_array(func_type: str, values) -> np.ndarray:
+    """
+    将读取结果转为紧凑的 NumPy 数组缓存：寄存器为 uint16，线圈/离散输入为 bool。
+    """
+    return np.asarray(values, dtype=np.uint16 if func_type in ("holding", "input") else np.bool_)
+
+
+def panel_keys(cid: str) -> SimpleNamespace:
+    """
+    返回连接 cid 对应的全部控件 / session_state 键名，每个连接只构建一次并缓存在 session_state 中。
+    """
+    cache = st.session_state.setdefault("_panel_keys", {})
+    keys = cache.get(cid)
+    if keys is None:
+        # 连接 id 为十六进制串，可直接用作键后缀
+        safe = cid
+        keys = SimpleNamespace(
+            safe=safe,
+            func=f"func_opt_{safe}",
+            plc=f"plc_addr_{safe}",
+            count=f"count_{safe}",
+            write_flag=f"write_flag_{safe}",
+            conn_failed=f"conn_failed_{cid}",
+            read=f"read_btn_{safe}",
+            write_toggle=f"write_toggle_{safe}",
+            batch_form=f"batch_write_form_{safe}",
+            batch_plc=f"batch_plc_{safe}",
+            batch_cnt=f"batch_cnt_{safe}",
+            batch_values=f"batch_values_{safe}",
+            batch_saved=f"batch_saved_{safe}",
+            clone=f"clone_{safe}",
+            delete=f"delete_{safe}",
+            page_size=f"page_size_{safe}",
+            page=f"page_{safe}",
+            csv=f"csv_{safe}",
+            csv_dl=f"csv_dl_{safe}",
+            edit_form=f"edit_form_{safe}",
+            addr=f"_addr_{safe}",
+            poll_ms=f"poll_ms_{safe}",
+        )
+        cache[cid] = keys
+    return keys
+
+
+def current_function(k: SimpleNamespace) -> tuple:
+    """
+    返回面板当前选择的功能 (显示名, 类型, 基址)；尚未选择或无效时为默认功能。
+    """
+    return FUNCTION_BY_DISPLAY.get(st.session_state.get(k.func), DEFAULT_FUNCTION)
+
+
+def cached_modbus_address(addr_key: str, plc_addr: int, base: int) -> int:
+    """
+    按 (PLC 地址, 基址) 在 session_state 中缓存换算结果，输入未变化时直接复用。
+    """
+    key = (int(plc_addr), int(base))
+    cached = st.session_state.get(addr_key)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    addr = plc_to_modbus(*key)
+    st.session_state[addr_key] = (key, addr)
+    return addr
+
+
 # ---------- 初始化 session state ----------
-ensure_session_default("read_values", {})
-ensure_session_default("last_modbus_address", {})
-ensure_session_default("last_plc_address", {})
-ensure_session_default("clone_map", {})  # mapping parent_id -> list of child_ids
-ensure_session_default("_write_flags", {})  # mapping safe_id -> bool for inline write visibility
-ensure_session_default("editing_cell", None)
+# 读取结果：cid -> {"values": 数组, "modbus_addr": int, "plc_addr": int}。三个字段总是一起读写 / 删除，
+# 合并为一条记录后每次访问只需一次查找；整个脚本中频繁访问，只从 session_state 取一次
+read_state = st.session_state.setdefault("read_state", {})
+st.session_state.setdefault("clone_map", {})  # mapping parent_id -> list of child_ids
+st.session_state.setdefault("_connect_futures", {})  # mapping cid -> 后台自动连接的 Future
+st.session_state.setdefault("_bg_poll_ts", {})  # mapping cid -> 已取用的后台轮询结果时间戳
+st.session_state.setdefault("_polls_owned", set())  # 本会话启动 / 沿用的后台轮询所属的 cid
 
 # Sidebar: create connection form
 with st.sidebar.expander("新增 Modbus TCP 连接", expanded=True):
@@ -89,319 +395,197 @@ with st.sidebar.expander("新增 Modbus TCP 连接", expanded=True):
                     )
                 else:
                     conn = manager.create_connection(host=host, port=int(port), unit=int(unit), name=name or None)
-                    # 自动连接，最多重试 5 次
-                    max_attempts = 5
-                    attempt = 0
-                    connected = False
-                    backoff_base = 0.5
-                    st.info(f"正在尝试自动连接 ({max_attempts} 次重试)...")
-                    while attempt < max_attempts:
-                        attempt += 1
-                        try:
-                            ok = conn.connect()
-                        except Exception:
-                            ok = False
-                        if ok:
-                            connected = True
-                            break
-                        time.sleep(backoff_base * attempt)
-                    if connected:
-                        st.session_state.pop(f"conn_failed_{conn.id}", None)
-                        st.success(f"创建并已连接: {conn.id} ({conn.name})")
-                        rerun()
-                    else:
-                        st.session_state[f"conn_failed_{conn.id}"] = True
-                        st.error(f"创建连接 {conn.id} 但自动连接失败（尝试 {max_attempts} 次）")
-                        rerun()
+                    # 后台自动连接，最多尝试 AUTO_CONNECT_ATTEMPTS 次
+                    start_auto_connect(conn)
+                    st.success(f"已创建连接: {conn.id} ({conn.name})，正在后台自动连接...")
+                    request_rerun()
             except Exception as e:
                 st.error(f"创建失败: {e}")
 
+# 收取已完成的后台自动连接结果（成功清除失败标记，失败则标记）
+harvest_connects()
+
 # Get connections
-conns = manager.list_connections()
-conn_map = {c["id"]: c for c in conns}
-selected_ids = [c["id"] for c in conns] if conns else []
+conn_version = manager.version
+conns, conn_map = _cached_list(conn_version)
+selected_ids, conn_labels = _conn_labels(conn_version)
+conn_by_id = _conn_objects(conn_version)
 
 if not selected_ids:
     st.info("当前没有连接，请先在左边栏创建一个或多个连接。")
     st.stop()
 
-st.markdown("## 已连接（自动显示所有连接，克隆项与原连接放在同一方框） ")
-
-# Function options: (display string, internal type, base address for PLC example)
-FUNCTION_OPTIONS = [
-    ("01 Coil Status (0x) - Coil", "coils", 1),
-    ("02 Input Status (1x) - Discrete Input", "discrete", 10001),
-    ("03 Holding Register (4x) - Holding", "holding", 40001),
-    ("04 Input Registers (3x) - Input Reg", "input", 30001),
-]
-func_display_list = [opt[0] for opt in FUNCTION_OPTIONS]
-
-# Clean clone_map
-clean_clone_map = {}
-for parent_id, children in st.session_state["clone_map"].items():
-    valid_children = [cid for cid in children if cid in conn_map]
-    if valid_children and parent_id in conn_map:
-        clean_clone_map[parent_id] = valid_children
-st.session_state["clone_map"] = clean_clone_map
-
-# Build child -> parent
-child_to_parent = {}
-for p, childs in st.session_state["clone_map"].items():
-    for ch in childs:
-        child_to_parent[ch] = p
+# 只执行当前选中视图的渲染代码，未显示的部分不创建任何控件
+VIEW_OPTIONS = ("全部", "连接", "读取结果")
+active_view = st.radio("显示", VIEW_OPTIONS, horizontal=True, key="active_view")
+
+# 未渲染的控件会在整页 rerun 结束时被 Streamlit 从 session_state 中清除：对隐藏视图中的控件键
+# 重新赋值一次，使面板配置（后台轮询仍按它读取）与分页在切回前保持不变
+PANEL_WIDGET_FIELDS = ("func", "plc", "count", "poll_ms")
+RESULT_WIDGET_FIELDS = ("page_size", "page")
+hidden_fields = ()
+if active_view == "读取结果":
+    hidden_fields = PANEL_WIDGET_FIELDS
+elif active_view == "连接":
+    hidden_fields = RESULT_WIDGET_FIELDS
+for cid in selected_ids:
+    k = panel_keys(cid)
+    for field in hidden_fields:
+        key = getattr(k, field)
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+# clone_map 只会在新建 / 删除连接时变化，而两者都会改变 manager.version（包括其它会话中的删除）：
+# 仅在 version 变化后清理 clone_map 并重建顶层连接列表，其余 rerun 直接复用
+if st.session_state.get("_clone_tree_version") != conn_version:
+    # Clean clone_map：一次遍历过滤掉已删除的父 / 子连接，并收集所有仍有效的子连接
+    clean_clone_map = {}
+    child_ids = set()
+    for parent_id, children in st.session_state["clone_map"].items():
+        if parent_id not in conn_map:
+            continue
+        valid_children = [cid for cid in children if cid in conn_map]
+        if valid_children:
+            clean_clone_map[parent_id] = valid_children
+            child_ids.update(valid_children)
+    st.session_state["clone_map"] = clean_clone_map
 
-top_level_ids = [cid for cid in selected_ids if cid not in child_to_parent]
+    st.session_state["_top_level_ids"] = [cid for cid in selected_ids if cid not in child_ids]
+    st.session_state["_clone_tree_version"] = conn_version
+top_level_ids = st.session_state["_top_level_ids"]
 
 
+# 每个连接面板是一个独立 fragment：切换功能/地址/数量等控件只重跑该面板；
+# 读取、新建、删除会影响结果表或面板列表，仍在面板末尾通过 flush_rerun() 触发整页刷新；
+# 批量写入只需收起本面板的表单（缓存已原地更新，结果区下一次定时刷新即显示），只重跑本面板
+@_fragment
 def render_connection_panel(conn_id: str, show_clone_button: bool):
-    conn_meta = manager.get(conn_id)
+    conn_meta = conn_by_id.get(conn_id)
     if conn_meta is None:
         st.warning(f"连接 {conn_id} 不存在")
         return
 
     cid = conn_meta.id
-    safe = cid.replace("-", "_")
-    func_key = f"func_opt_{safe}"
-    plc_key = f"plc_addr_{safe}"
-    count_key = f"count_{safe}"
-    write_flag_key = f"write_flag_{safe}"
-
-    ensure_session_default(func_key, func_display_list[2])
-    if st.session_state.get(func_key) not in func_display_list:
-        st.session_state[func_key] = func_display_list[2]
-    ensure_session_default(plc_key, FUNCTION_OPTIONS[2][2])
-    ensure_session_default(count_key, 4)
-    if write_flag_key not in st.session_state.get("_write_flags", {}):
-        st.session_state["_write_flags"][write_flag_key] = False
-
-    cur_func = st.session_state.get(func_key, func_display_list[2])
-    try:
-        cur_idx = func_display_list.index(cur_func)
-        cur_base = FUNCTION_OPTIONS[cur_idx][2]
-    except Exception:
-        cur_idx = 2
-        cur_base = FUNCTION_OPTIONS[2][2]
-
-    display_name = conn_meta.name or f"{conn_meta.host}:{conn_meta.port}"
+    k = panel_keys(cid)
+    func_key, plc_key, count_key, write_flag_key = k.func, k.plc, k.count, k.write_flag
+
+    ss = st.session_state
+    # 轮询线程随连接在进程内共享：本会话首次显示该面板（新标签页 / 刷新页面）时以正在运行的轮询配置
+    # 初始化控件，避免默认值（自动刷新 0、默认地址 / 数量）把其它会话启动的轮询停掉或改掉
+    running_poll = conn_meta.poll_config
+    if running_poll is not None and k.poll_ms not in ss:
+        poll_type, poll_addr, poll_cnt = running_poll[1][0]
+        poll_opt = next((opt for opt in FUNCTION_BY_DISPLAY.values() if opt[1] == poll_type), None)
+        if poll_opt is not None:
+            ss[func_key], ss[plc_key], ss[count_key] = poll_opt[0], poll_addr + poll_opt[2], poll_cnt
+            ss[k.poll_ms] = running_poll[0]
+    if ss.setdefault(func_key, DEFAULT_FUNCTION[0]) not in FUNCTION_BY_DISPLAY:
+        ss[func_key] = DEFAULT_FUNCTION[0]
+    ss.setdefault(plc_key, DEFAULT_FUNCTION[2])
+    ss.setdefault(count_key, 4)
+    ss.setdefault(k.poll_ms, 0)
+    write_flag = ss.setdefault(write_flag_key, False)  # 批量写入表单是否展开
+
+    # 连接的静态属性只取一次，后续 f-string / 克隆均复用局部变量
+    name, host, port, unit = conn_meta.name, conn_meta.host, conn_meta.port, conn_meta.unit
+    display_name = name or f"{host}:{port}"
     st.markdown(
-        f"### {display_name}  ({conn_meta.host}:{conn_meta.port})  ID: {conn_meta.id}  Unit: {conn_meta.unit}  状态: {'已连接' if conn_meta.connected else '未连接'}"
+        f"### {display_name}  ({host}:{port})  ID: {cid}  Unit: {unit}  状态: {'已连接' if conn_meta.connected else '未连接'}"
     )
 
-    if st.session_state.get(f"conn_failed_{cid}", False):
-        st.error("自动连接失败：已尝试 5 次，仍未连接。")
-
-    cols = st.columns([3, 2, 1])
-    with cols[0]:
-        sel = st.selectbox(f"功能（{display_name}）", options=func_display_list, key=func_key)
-        sel_idx = func_display_list.index(sel)
-        func_type = FUNCTION_OPTIONS[sel_idx][1]
-        func_base = FUNCTION_OPTIONS[sel_idx][2]
-    with cols[1]:
+    if cid in st.session_state["_connect_futures"]:
+        st.info("正在自动连接...")
+    elif st.session_state.get(k.conn_failed, False):
+        st.error(f"自动连接失败：已尝试 {AUTO_CONNECT_ATTEMPTS} 次，仍未连接。")
+
+    # 控件与按钮合并为一行布局：功能 | PLC 地址 | 数量 | 自动刷新 | 读取 | 写入 | 新建 | 删除
+    c_func, c_plc, c_cnt, c_poll, c_read, c_write, c_clone, c_delete = st.columns([3, 2, 1, 1, 1, 1, 1, 1])
+    with c_func:
+        sel = st.selectbox(f"功能（{display_name}）", options=FUNCTION_DISPLAY_LIST, key=func_key)
+        _, func_type, func_base = FUNCTION_BY_DISPLAY[sel]
+    with c_plc:
         plc_val = st.number_input(f"PLC 地址（示例 {func_base}）", min_value=0, step=1, key=plc_key)
-    with cols[2]:
+    with c_cnt:
         cnt_val = st.number_input("数量", min_value=1, step=1, key=count_key)
-
-    # second row: Read | Write (批量) | Clone | Delete
-    btn_cols = st.columns([1, 1, 1, 1])
-    with btn_cols[0]:
-        if st.button("读取", key=f"read_btn_{safe}"):
+    with c_poll:
+        poll_ms = st.number_input("自动刷新 (ms)", min_value=0, step=100, key=k.poll_ms, help="0 表示关闭")
+    plc_val, cnt_val, poll_ms = int(plc_val), int(cnt_val), int(poll_ms)
+    modbus_address = cached_modbus_address(k.addr, plc_val, func_base)
+
+    # 自动刷新：由连接自己的后台线程按间隔读取，结果在 poll_devices() 中直接取用；配置变化时才重启线程
+    # 只停止本会话启动（或按上面的初始化沿用）的轮询，其它会话的轮询不受本会话控件默认值影响
+    polls_owned = ss["_polls_owned"]
+    if poll_ms > 0 and not st.session_state.get(k.conn_failed, False):
+        poll_config = (poll_ms, ((func_type, modbus_address, cnt_val),))
+        if conn_meta.poll_config != poll_config:
+            conn_meta.start_poll(*poll_config)
+        polls_owned.add(cid)
+    elif cid in polls_owned:
+        polls_owned.discard(cid)
+        if conn_meta.poll_config is not None:
+            conn_meta.stop_poll()
+
+    with c_read:
+        if st.button("读取", key=k.read):
             try:
-                cur_plc = int(st.session_state.get(plc_key))
-                cur_cnt = int(st.session_state.get(count_key))
-                cur_func_display = st.session_state.get(func_key)
-                cur_idx = func_display_list.index(cur_func_display) if cur_func_display in func_display_list else 2
-                cur_func_type = FUNCTION_OPTIONS[cur_idx][1]
-                cur_func_base = FUNCTION_OPTIONS[cur_idx][2]
-                modbus_address = plc_to_modbus(cur_plc, cur_func_base)
+                # 直接复用上方控件返回的值，无需再从 session_state 读取并换算
                 if not conn_meta.connected:
                     ok = conn_meta.connect()
                     if not ok:
                         raise ConnectionError("connect failed")
-                values = conn_meta.read(type=cur_func_type, address=int(modbus_address), count=int(cur_cnt), allow_reconnect=True)
-                st.session_state["read_values"][cid] = values
-                st.session_state["last_modbus_address"][cid] = int(modbus_address)
-                st.session_state["last_plc_address"][cid] = int(cur_plc)
+                # 手动读取总是访问设备，不取其它面板 / 会话刚缓存的响应
+                values = conn_meta.read(
+                    type=func_type, address=modbus_address, count=cnt_val, allow_reconnect=True, use_cache=False
+                )
+                read_state[cid] = {
+                    "values": to_value_array(func_type, values),
+                    "modbus_addr": modbus_address,
+                    "plc_addr": plc_val,
+                }
                 if conn_meta.connected:
-                    st.session_state.pop(f"conn_failed_{cid}", None)
+                    st.session_state.pop(k.conn_failed, None)
                 st.success(f"{display_name} 读取成功")
             except ConnectionError as ce:
                 st.error(f"{display_name} 未连接：{ce}")
             except Exception as e:
-                st.session_state.get("read_values", {}).pop(cid, None)
-                st.session_state.get("last_modbus_address", {}).pop(cid, None)
-                st.session_state.get("last_plc_address", {}).pop(cid, None)
+                read_state.pop(cid, None)
                 st.error(f"读取失败: {e}")
-            rerun()
+            request_rerun()
 
-    with btn_cols[1]:
+    with c_write:
         # Batch write
-        write_flag = st.session_state["_write_flags"].get(write_flag_key, False)
         if not write_flag:
-            if st.button("写入", key=f"write_toggle_{safe}"):
-                st.session_state["_write_flags"][write_flag_key] = True
-                rerun()
-        else:
-            cur_func_display = st.session_state.get(func_key)
-            cur_idx = func_display_list.index(cur_func_display) if cur_func_display in func_display_list else 2
-            cur_func_type = FUNCTION_OPTIONS[cur_idx][1]
-            cur_func_base = FUNCTION_OPTIONS[cur_idx][2]
-
-            with st.form(f"batch_write_form_{safe}"):
-                start_plc = st.number_input(
-                    "PLC 地址起始",
-                    min_value=0,
-                    step=1,
-                    value=int(st.session_state.get(plc_key, cur_func_base)),
-                    key=f"batch_plc_{safe}",
-                )
-                cnt = st.number_input(
-                    "数量",
-                    min_value=1,
-                    step=1,
-                    value=int(st.session_state.get(count_key, 4)),
-                    key=f"batch_cnt_{safe}",
-                )
+            st.button("写入", key=k.write_toggle, on_click=set_write_flag, args=(write_flag_key, True))
 
-                # default batch values
-                try:
-                    default_vals = st.session_state.get("read_values", {}).get(cid)
-                    if default_vals is None:
-                        default_batch = ",".join("0" for _ in range(int(cnt)))
-                    else:
-                        slice_vals = default_vals[:int(cnt)]
-                        default_batch = ",".join(str(v) for v in slice_vals)
-                        if len(slice_vals) < int(cnt):
-                            default_batch += (
-                                ","
-                                + ",".join("0" for _ in range(int(cnt) - len(slice_vals)))
-                                if int(cnt) - len(slice_vals) > 0
-                                else ""
-                            )
-                except Exception:
-                    default_batch = ",".join("0" for _ in range(int(cnt)))
-
-                batch_widget_key = f"batch_values_{safe}"
-                batch_saved_key = f"batch_saved_{safe}"
-                initial_batch_value = st.session_state.get(batch_saved_key, default_batch)
-
-                batch_text = st.text_area(
-                    "批量值，逗号或空白分隔（数量应与 上方 数量 相同）",
-                    value=initial_batch_value,
-                    key=batch_widget_key,
-                    height=100,
-                )
-                submit_write = st.form_submit_button("写入确认")
-                cancel_write = st.form_submit_button("取消")
-                if submit_write:
-                    raw = batch_text.strip()
-                    if not raw:
-                        st.error("批量值为空，请输入值。")
-                    else:
-                        parts = [p for p in [x.strip() for x in raw.replace("\n", " ").replace("\t", " ").split(",")] if p != ""]
-                        if len(parts) == 1 and (" " in parts[0]):
-                            parts = [p for p in parts[0].split() if p != ""]
-                        final_vals = []
-                        for token in parts:
-                            for sub in token.split():
-                                if sub != "":
-                                    final_vals.append(sub)
-                        try:
-                            if cur_func_type == "coils":
-                                parsed = [1 if token not in ("0", "False", "false", "off", "OFF") else 0 for token in final_vals]
-                            else:
-                                parsed = [int(token) for token in final_vals]
-                        except Exception as e:
-                            st.error(f"解析批量值失败，请确保为整数（或布尔）: {e}")
-                            parsed = None
-
-                        if parsed is not None:
-                            desired = int(cnt)
-                            if len(parsed) < desired:
-                                parsed = parsed + [0] * (desired - len(parsed))
-                            elif len(parsed) > desired:
-                                parsed = parsed[:desired]
-
-                            modbus_address = plc_to_modbus(start_plc, cur_func_base)
-
-                            try:
-                                if not conn_meta.connected:
-                                    ok = conn_meta.connect()
-                                    if not ok:
-                                        st.error("与设备连接失败，无法写入")
-                                        raise ConnectionError("connect failed")
-                                if hasattr(conn_meta, "write"):
-                                    try:
-                                        conn_meta.write(type=cur_func_type, address=int(modbus_address), value=parsed, allow_reconnect=True)
-                                    except TypeError:
-                                        for idx, v in enumerate(parsed):
-                                            conn_meta.write(type=cur_func_type, address=int(modbus_address) + idx, value=v, allow_reconnect=True)
-                                else:
-                                    raise RuntimeError("连接对象不支持写操作")
-                                try:
-                                    rv = st.session_state.get("read_values", {}).get(cid)
-                                    lm = st.session_state.get("last_modbus_address", {}).get(cid)
-                                    if rv is not None and lm is not None:
-                                        for idx in range(desired):
-                                            target_addr = int(modbus_address) + idx
-                                            if int(lm) <= target_addr < int(lm) + len(rv):
-                                                rv_idx = int(target_addr) - int(lm)
-                                                rv[rv_idx] = parsed[idx]
-                                except Exception:
-                                    pass
-
-                                st.success("批量写入成功")
-                            except Exception as e:
-                                st.error(f"写入失败: {e}")
-
-                        st.session_state[batch_saved_key] = batch_text
-                        st.session_state["_write_flags"][write_flag_key] = False
-                        rerun()
-                if cancel_write:
-                    st.session_state["_write_flags"][write_flag_key] = False
-                    rerun()
-
-    with btn_cols[2]:
+    with c_clone:
         # Clone (自动连接新 clone)
         if show_clone_button:
-            if st.button("新建", key=f"clone_{safe}"):
+            if st.button("新建", key=k.clone):
                 try:
-                    clone_name = f"{conn_meta.name}_copy" if conn_meta.name else None
-                    new_conn = manager.create_connection(host=conn_meta.host, port=conn_meta.port, unit=conn_meta.unit, name=clone_name)
-                    max_attempts = 5
-                    attempt = 0
-                    connected = False
-                    backoff_base = 0.5
-                    while attempt < max_attempts:
-                        attempt += 1
-                        try:
-                            ok = new_conn.connect()
-                        except Exception:
-                            ok = False
-                        if ok:
-                            connected = True
-                            break
-                        time.sleep(backoff_base * attempt)
-                    if connected:
-                        st.success(f"已创建并连接新连接: {new_conn.id} ({new_conn.name})")
-                        st.session_state.pop(f"conn_failed_{new_conn.id}", None)
-                    else:
-                        st.session_state[f"conn_failed_{new_conn.id}"] = True
-                        st.error(f"已创建新连接 {new_conn.id}，但自动连接失败（尝试 {max_attempts} 次）")
-                    lst = st.session_state["clone_map"].setdefault(conn_meta.id, [])
+                    clone_name = f"{name}_copy" if name else None
+                    new_conn = manager.create_connection(host=host, port=port, unit=unit, name=clone_name)
+                    start_auto_connect(new_conn)
+                    st.success(f"已创建新连接: {new_conn.id} ({new_conn.name})，正在后台自动连接...")
+                    lst = st.session_state["clone_map"].setdefault(cid, [])
                     if new_conn.id not in lst:
                         lst.append(new_conn.id)
-                    rerun()
+                    request_rerun()
                 except Exception as e:
                     st.error(f"新建连接失败: {e}")
 
-    with btn_cols[3]:
+    with c_delete:
         # 删除连接
-        if st.button("删除", key=f"delete_{safe}"):
+        if st.button("删除", key=k.delete):
             try:
                 manager.remove(cid)
-                st.session_state.get("read_values", {}).pop(cid, None)
-                st.session_state.get("last_modbus_address", {}).pop(cid, None)
-                st.session_state.get("last_plc_address", {}).pop(cid, None)
+                st.session_state.get("_panel_keys", {}).pop(cid, None)
+                st.session_state["_connect_futures"].pop(cid, None)
+                # 清理该连接在 session_state 中的非控件状态（控件状态由 Streamlit 在控件不再渲染时自动回收）
+                for key in (write_flag_key, k.conn_failed, k.batch_saved, k.addr):
+                    st.session_state.pop(key, None)
+                st.session_state["_bg_poll_ts"].pop(cid, None)
+                st.session_state["_polls_owned"].discard(cid)
+                read_state.pop(cid, None)
                 st.session_state["clone_map"].pop(cid, None)
                 for p in list(st.session_state["clone_map"].keys()):
                     lst = st.session_state["clone_map"].get(p, [])
@@ -417,154 +601,382 @@ def render_connection_panel(conn_id: str, show_clone_button: bool):
                 st.success(f"{display_name} 已删除")
             except Exception as e:
                 st.error(f"删除失败: {e}")
-            rerun()
+            request_rerun()
+
+    # 批量写入表单放在按钮行下方，占满整行宽度
+    if write_flag:
+        # 功能 / 地址 / 数量直接复用本面板上方控件已解析的值，不再重复查表
+        cur_func_type, cur_func_base = func_type, func_base
+
+        with st.form(k.batch_form):
+            start_plc = st.number_input(
+                "PLC 地址起始",
+                min_value=0,
+                step=1,
+                value=plc_val,
+                key=k.batch_plc,
+            )
+            cnt = st.number_input(
+                "数量",
+                min_value=1,
+                step=1,
+                value=cnt_val,
+                key=k.batch_cnt,
+            )
+
+            batch_widget_key = k.batch_values
+            batch_saved_key = k.batch_saved
+            initial_batch_value = st.session_state.get(batch_saved_key)
+            if initial_batch_value is None:
+                # 默认批量值：上次读取结果的前 cnt 个值（不足补 0），由 NumPy 整体转换为文本
+                n = int(cnt)
+                default_arr = np.zeros(n, dtype=np.int64)
+                rs = read_state.get(cid)
+                if rs is not None:
+                    cached_vals = rs["values"]
+                    m = min(n, len(cached_vals))
+                    default_arr[:m] = cached_vals[:m]
+                initial_batch_value = ",".join(default_arr.astype(str))
+
+            batch_text = st.text_area(
+                "批量值，逗号或空白分隔（数量应与 上方 数量 相同）",
+                value=initial_batch_value,
+                key=batch_widget_key,
+                height=100,
+            )
+            submit_write = st.form_submit_button("写入确认")
+            st.form_submit_button("取消", on_click=set_write_flag, args=(write_flag_key, False))
+            if submit_write:
+                raw = batch_text.strip(_BATCH_SEP_CHARS)
+                if not raw:
+                    st.error("批量值为空，请输入值。")
+                else:
+                    desired = int(cnt)
+                    try:
+                        parsed = parse_batch_values(raw, cur_func_type, desired)
+                    except Exception as e:
+                        st.error(f"解析批量值失败，请确保为整数（或布尔）: {e}")
+                        parsed = None
+
+                    if parsed is not None:
+
+                        modbus_address = plc_to_modbus(start_plc, cur_func_base)
+
+                        try:
+                            if not conn_meta.connected:
+                                ok = conn_meta.connect()
+                                if not ok:
+                                    st.error("与设备连接失败，无法写入")
+                                    raise ConnectionError("connect failed")
+                            if cur_func_type not in WRITABLE_TYPES:
+                                raise RuntimeError("当前功能不支持写操作")
+                            # 差量写入：先从设备读取目标区间的当前值（不使用可能已过期、或已被其他会话 / HMI
+                            # 改写的读取缓存），只写入与之不同的地址；读取失败时全部写入。相邻待写地址合并为一次多值写入
+                            new_vals = np.asarray(parsed)
+                            try:
+                                current = conn_meta.read(
+                                    type=cur_func_type,
+                                    address=int(modbus_address),
+                                    count=desired,
+                                    allow_reconnect=True,
+                                    use_cache=False,
+                                )
+                                dirty = new_vals.astype(np.int64) != np.asarray(current, dtype=np.int64)
+                            except Exception:
+                                dirty = np.ones(desired, dtype=np.bool_)
+                            runs = contiguous_runs(np.flatnonzero(dirty))
+                            for run_lo, run_hi in runs:
+                                run_vals = parsed[run_lo:run_hi]
+                                value = run_vals if len(run_vals) > 1 else run_vals[0]
+                                conn_meta.write(type=cur_func_type, address=int(modbus_address) + run_lo, value=value, allow_reconnect=True)
+                            rs = read_state.get(cid)
+                            if rs is not None:
+                                # 写入区间与缓存区间取交集，直接对 NumPy 缓存做切片赋值，原地更新
+                                rv, lm = rs["values"], int(rs["modbus_addr"])
+                                lo = max(int(modbus_address), lm)
+                                hi = min(int(modbus_address) + desired, lm + len(rv))
+                                if lo < hi:
+                                    off = lo - int(modbus_address)
+                                    rv[lo - lm:hi - lm] = new_vals[off:off + hi - lo]
+
+                            written = int(dirty.sum())
+                            skipped = desired - written
+                            if runs:
+                                st.success(
+                                    f"批量写入成功：写入 {written} 个值（{len(runs)} 次请求），"
+                                    f"跳过 {skipped} 个与设备当前值相同的值"
+                                )
+                            else:
+                                st.info(f"{skipped} 个值均与设备当前值相同，未写入")
+                        except Exception as e:
+                            st.error(f"写入失败: {e}")
+
+                    st.session_state[batch_saved_key] = batch_text
+                    st.session_state[write_flag_key] = False
+                    request_rerun("fragment")
+
+    flush_rerun()
 
 
 # --- 自动轮询 / 自动刷新（用于检测 PLC 外部修改并在页面刷新显示） ---
-# 如果安装了 streamlit-autorefresh，则启用自动刷新（毫秒）
+# 支持 fragment 时由结果区 fragment 定时重跑（只轮询并刷新结果区，不重跑整页）；
+# 否则如果安装了 streamlit-autorefresh，则启用整页自动刷新（毫秒）
 REFRESH_INTERVAL_MS = 3000  # 3s，按需调整
-if st_autorefresh is not None:
+DEFAULT_PAGE_SIZE = 50  # 读取结果每页默认行数
+POLL_WAIT_S = 1.0  # 每次 rerun 等待轮询结果的最长时间（秒）
+POLL_MIN_INTERVAL_S = REFRESH_INTERVAL_MS / 1000 * 0.8  # 两次轮询的最短间隔；略小于刷新间隔，避免刷新时刻抖动跳过轮询
+POLL_FAIL_BACKOFF_S = 5.0  # 轮询失败且连接已断开后，暂停该组轮询的时间（秒），避免每次都卡在重连超时上
+MAX_RENDER_ROWS = 500  # 每页最多渲染行数，与读取数量无关；完整结果可导出 CSV
+if st_autorefresh is not None and _FRAGMENT is None:
     st_autorefresh(interval=REFRESH_INTERVAL_MS, key="autorefresh")
 
-# 轮询：尽量使用面板上当前配置（plc addr / count / function）来读取最新值
-for cid in list(selected_ids):
-    conn_meta = manager.get(cid)
-    if conn_meta is None:
-        continue
-    try:
-        safe = cid.replace("-", "_")
-        cur_plc = int(st.session_state.get(f"plc_addr_{safe}", FUNCTION_OPTIONS[2][2]))
-        cur_cnt = int(st.session_state.get(f"count_{safe}", 4))
-        func_opt = st.session_state.get(f"func_opt_{safe}", func_display_list[2])
-        cur_idx = func_display_list.index(func_opt) if func_opt in func_display_list else 2
-        cur_func_type = FUNCTION_OPTIONS[cur_idx][1]
-        cur_func_base = FUNCTION_OPTIONS[cur_idx][2]
-        modbus_address = plc_to_modbus(cur_plc, cur_func_base)
-    except Exception:
-        continue
 
-    # 如果连接被标记为自动连接失败则跳过轮询（避免重复重试刷屏），否则短连接尝试读取
-    if st.session_state.get(f"conn_failed_{cid}", False):
-        continue
+def harvest_polls(poll_futures: dict):
+    """
+    收取已完成的后台轮询结果并写入读取缓存；未完成的保留在 poll_futures 中。
+    """
+    for group_key, (jobs, fut) in list(poll_futures.items()):
+        if not fut.done():
+            continue
+        del poll_futures[group_key]
+        ok, results = fut.result()
+        if not ok:
+            # 忽略单次读取失败，保留上一次显示的值；记录失败时间用于退避
+            st.session_state["_poll_backoff"][group_key] = time.monotonic()
+            continue
+        st.session_state["_poll_backoff"].pop(group_key, None)
+        for (cid, _, func_type, modbus_address, _, cur_plc), values in zip(jobs, results):
+            if cid not in conn_by_id:
+                continue
+            read_state[cid] = {
+                "values": to_value_array(func_type, values),
+                "modbus_addr": modbus_address,
+                "plc_addr": cur_plc,
+            }
+            # clear failure mark if any
+            st.session_state.pop(panel_keys(cid).conn_failed, None)
+
+
+def poll_devices():
+    """
+    按各面板当前配置（plc addr / count / function）在后台轮询设备，并收取已完成的结果。
+    """
+    poll_jobs = []
+    bg_poll_ts = st.session_state["_bg_poll_ts"]
+    for cid in list(selected_ids):
+        conn_meta = conn_by_id.get(cid)
+        if conn_meta is None:
+            continue
+        try:
+            k = panel_keys(cid)
+            cur_plc = int(st.session_state.get(k.plc, DEFAULT_FUNCTION[2]))
+            cur_cnt = int(st.session_state.get(k.count, 4))
+            _, cur_func_type, cur_func_base = current_function(k)
+            modbus_address = cached_modbus_address(k.addr, cur_plc, cur_func_base)
+        except Exception:
+            continue
+
+        # 如果连接被标记为自动连接失败或仍在后台自动连接，则跳过轮询（避免重复重试刷屏），否则短连接尝试读取
+        if st.session_state.get(k.conn_failed, False) or cid in st.session_state["_connect_futures"]:
+            continue
+
+        # 该面板已由连接的后台线程按相同配置轮询：只取最新结果，不再提交线程池读取
+        if conn_meta.poll_config is not None and conn_meta.poll_config[1] == (
+            (cur_func_type, int(modbus_address), int(cur_cnt)),
+        ):
+            last_poll = conn_meta.last_poll
+            if last_poll is not None and last_poll[1] == conn_meta.poll_config[1]:
+                ts, _, results = last_poll
+                # 值未变化时后台轮询沿用旧时间戳：若本面板的结果已被清除（如手动读取失败），也要重新取用
+                if bg_poll_ts.get(cid) != ts or cid not in read_state:
+                    bg_poll_ts[cid] = ts
+                    read_state[cid] = {
+                        "values": to_value_array(cur_func_type, results[0]),
+                        "modbus_addr": int(modbus_address),
+                        "plc_addr": cur_plc,
+                    }
+            continue
+
+        poll_jobs.append((cid, conn_meta, cur_func_type, int(modbus_address), int(cur_cnt), int(cur_plc)))
+
+    # 克隆出的面板常与原连接指向同一设备：按 (host, port, unit, 功能) 分组，每组只发起合并后的读取，
+    # 避免同一设备的重叠区间被重复读取。
+    poll_groups = {}
+    for job in poll_jobs:
+        conn_meta = job[1]
+        poll_groups.setdefault((conn_meta.host, conn_meta.port, conn_meta.unit, job[2]), []).append(job)
+
+    # 各组的读取互不依赖：并发提交到线程池，总耗时约为最慢设备的 RTT 而非所有 RTT 之和。
+    # 轮询在后台线程中进行：先收取上次 rerun 以来已完成的结果，再为空闲的组提交新的读取；
+    # 已有显示值的组不等待，rerun 耗时与设备数量 / RTT 无关。只有尚无任何读取结果的组
+    # 才最多等待 POLL_WAIT_S 秒，以便首次打开页面时尽快显示数据。未完成的读取留在 _poll_futures 中，
+    # 且在完成前不会为同一组重复提交。工作线程只做网络 I/O，session_state 仍在脚本线程中更新。
+    # 轮询按时间节流：操作控件引起的 rerun 不会额外发起读取，只有距上次轮询超过 POLL_MIN_INTERVAL_S
+    # 或有连接尚无读取结果时才提交。
+    poll_futures = st.session_state.setdefault("_poll_futures", {})
+    poll_backoff = st.session_state.setdefault("_poll_backoff", {})
+    harvest_polls(poll_futures)
+    now = time.monotonic()
+    poll_due = now - st.session_state.get("_last_poll", 0.0) >= POLL_MIN_INTERVAL_S
+    if poll_due:
+        st.session_state["_last_poll"] = now
+    for group_key, jobs in poll_groups.items():
+        if group_key in poll_futures:
+            continue
+        # 上次轮询失败且连接仍断开：退避期内跳过，不让重连超时占满线程池 / 拖慢首次等待
+        if not jobs[0][1].connected and now - poll_backoff.get(group_key, float("-inf")) < POLL_FAIL_BACKOFF_S:
+            continue
+        if poll_due or any(job[0] not in read_state for job in jobs):
+            poll_futures[group_key] = (jobs, _io_pool().submit(do_read_group, jobs))
+    first_reads = [
+        fut
+        for jobs, fut in poll_futures.values()
+        if any(job[0] not in read_state for job in jobs)
+    ]
+    if first_reads:
+        wait(first_reads, timeout=POLL_WAIT_S)
+        harvest_polls(poll_futures)
 
-    try:
-        values = conn_meta.read(type=cur_func_type, address=int(modbus_address), count=int(cur_cnt), allow_reconnect=True)
-        st.session_state["read_values"][cid] = values
-        st.session_state["last_modbus_address"][cid] = int(modbus_address)
-        st.session_state["last_plc_address"][cid] = int(cur_plc)
-        # clear failure mark if any
-        st.session_state.pop(f"conn_failed_{cid}", None)
-    except Exception:
-        # 忽略单次读取失败，保留上一次显示的值
-        pass
 
 # Render groups
-for parent_id in top_level_ids:
-    render_connection_panel(parent_id, show_clone_button=True)
+if active_view in ("全部", "连接"):
+    st.markdown("## 已连接（自动显示所有连接，克隆项与原连接放在同一方框） ")
+    for parent_id in top_level_ids:
+        render_connection_panel(parent_id, show_clone_button=True)
 
-    children = st.session_state["clone_map"].get(parent_id, [])
-    for child_id in children:
-        cols = st.columns([0.5, 9.5])
-        with cols[0]:
-            st.write("")
-        with cols[1]:
-            render_connection_panel(child_id, show_clone_button=False)
+        children = st.session_state["clone_map"].get(parent_id, [])
+        for child_id in children:
+            cols = st.columns([0.5, 9.5])
+            with cols[0]:
+                st.write("")
+            with cols[1]:
+                render_connection_panel(child_id, show_clone_button=False)
 
-    st.markdown("---")
+        st.markdown("---")
 
-# Read results area (uses st.session_state["read_values"] prepared above)
-st.markdown("## 读取结果（按连接分组）")
-for cid in selected_ids:
+
+# Read results area (uses st.session_state["read_state"] prepared by poll_devices)
+def _render_read_table(cid: str):
+    # 结果区 fragment 会脱离整页单独重跑，连接可能已被删除，因此直接向 manager 查询
     conn_meta = manager.get(cid)
     if conn_meta is None:
         st.warning(f"连接 {cid} 已不存在")
-        continue
-    st.markdown(f"**{conn_meta.name}  ({conn_meta.host}:{conn_meta.port})**  ID: {conn_meta.id}  Unit: {conn_meta.unit}")
-    read_values = st.session_state["read_values"].get(cid)
-    last_modbus_address = st.session_state["last_modbus_address"].get(cid)
-    last_plc_address = st.session_state["last_plc_address"].get(cid)
-    if read_values is None:
+        return
+    host, port, unit = conn_meta.host, conn_meta.port, conn_meta.unit
+    st.markdown(f"**{conn_labels.get(cid, conn_meta.name)}  ({host}:{port})**  ID: {cid}  Unit: {unit}")
+    rs = read_state.get(cid)
+    if rs is None:
         st.info("无读取结果或读取失败（见上方错误信息）")
-        continue
-
-    cols = st.columns([2, 2, 3])
-    cols[0].markdown("**PLC 地址**")
-    cols[1].markdown("**Modbus 地址**")
-    cols[2].markdown("**值（点击可直接修改）**")
-
-    for i, cur in enumerate(read_values):
-        addr_modbus = (last_modbus_address + i) if last_modbus_address is not None else i
-        addr_plc = (last_plc_address + i) if last_plc_address is not None else i
-        c0, c1, c2 = st.columns([2, 2, 3])
-        c0.write(addr_plc)
-        c1.write(addr_modbus)
-
-        safe = cid.replace("-", "_")
-        func_opt = st.session_state.get(f"func_opt_{safe}", None)
-        func_idx = func_display_list.index(func_opt) if func_opt in func_display_list else 2
-        func_type_for_edit = FUNCTION_OPTIONS[func_idx][1]
-
-        editing = st.session_state.get("editing_cell")
-        is_editing_this = editing and editing.get("conn_id") == cid and editing.get("address") == addr_modbus
-
-        if is_editing_this:
-            if func_type_for_edit == "coils":
-                widget_key = f"edit_input_{cid}_{addr_modbus}"
-                new_val_bool = c2.checkbox("值编辑", value=bool(st.session_state["read_values"][cid][i]), key=widget_key, label_visibility="collapsed")
-                btn_left, btn_right = c2.columns([1, 1])
-                if btn_left.button("确认", key=f"confirm_{cid}_{addr_modbus}"):
-                    try:
-                        new_val = 1 if bool(st.session_state.get(widget_key)) else 0
-                        if not conn_meta.connected:
-                            ok = conn_meta.connect()
-                            if not ok:
-                                st.error("与设备连接失败，无法写入")
-                                raise ConnectionError("connect failed")
-                        if hasattr(conn_meta, "write"):
-                            conn_meta.write(type=func_type_for_edit, address=int(addr_modbus), value=new_val, allow_reconnect=True)
-                        st.session_state["read_values"][cid][i] = new_val
-                        st.success("写入成功")
-                    except Exception as e:
-                        st.error(f"写入失败: {e}")
-                    st.session_state["editing_cell"] = None
-                    rerun()
-                if btn_right.button("取消", key=f"cancel_{cid}_{addr_modbus}"):
-                    st.session_state["editing_cell"] = None
-                    rerun()
-            else:
-                widget_key = f"edit_input_{cid}_{addr_modbus}"
-                try:
-                    default_val = int(st.session_state["read_values"][cid][i])
-                except Exception:
-                    default_val = 0
-                new_val = c2.number_input("值编辑", value=default_val, step=1, key=widget_key, label_visibility="collapsed")
-                btn_left, btn_right = c2.columns([1, 1])
-                if btn_left.button("确认", key=f"confirm_{cid}_{addr_modbus}"):
-                    try:
-                        new_int = int(st.session_state.get(widget_key))
-                        if not conn_meta.connected:
-                            ok = conn_meta.connect()
-                            if not ok:
-                                st.error("与设备连接失败，无法写入")
-                                raise ConnectionError("connect failed")
-                        if hasattr(conn_meta, "write"):
-                            conn_meta.write(type=func_type_for_edit, address=int(addr_modbus), value=new_int, allow_reconnect=True)
-                        st.session_state["read_values"][cid][i] = int(new_int)
-                        st.success("写入成功")
-                    except Exception as e:
-                        st.error(f"写入失败: {e}")
-                    st.session_state["editing_cell"] = None
-                    rerun()
-                if btn_right.button("取消", key=f"cancel_{cid}_{addr_modbus}"):
-                    st.session_state["editing_cell"] = None
-                    rerun()
-        else:
-            value_click_key = f"value_click_{cid}_{addr_modbus}"
-            if c2.button(str(cur), key=value_click_key):
-                st.session_state["editing_cell"] = {
-                    "conn_id": cid,
-                    "address": addr_modbus,
-                    "index": i,
-                    "type": func_type_for_edit,
+        return
+    read_values, last_modbus_address, last_plc_address = rs["values"], rs["modbus_addr"], rs["plc_addr"]
+
+    # 分页：只为当前页的行创建控件，避免大数量读取时每次刷新都渲染全部行
+    k = panel_keys(cid)
+    safe = k.safe
+    page_size_key, page_key = k.page_size, k.page
+    ss = st.session_state
+    total = len(read_values)
+    page_cols = st.columns([1, 1, 4])
+    if int(ss.setdefault(page_size_key, DEFAULT_PAGE_SIZE)) > MAX_RENDER_ROWS:
+        st.session_state[page_size_key] = MAX_RENDER_ROWS
+    page_size = int(page_cols[0].number_input("每页行数", min_value=1, max_value=MAX_RENDER_ROWS, step=1, key=page_size_key))
+    page_count = max(1, (total + page_size - 1) // page_size)
+    if int(ss.setdefault(page_key, 1)) > page_count:
+        st.session_state[page_key] = page_count
+    page = int(page_cols[1].number_input("页码", min_value=1, max_value=page_count, step=1, key=page_key))
+    start = (page - 1) * page_size
+    end = min(start + page_size, total)
+    page_cols[2].caption(f"第 {start + 1}-{end} 行，共 {total} 行（{page}/{page_count} 页）")
+    if total > page_size and page_cols[2].checkbox("导出全部结果 CSV", key=k.csv):
+        page_cols[2].download_button(
+            "下载 CSV",
+            data=values_to_csv(read_values, last_plc_address, last_modbus_address),
+            file_name=f"read_values_{safe}.csv",
+            mime="text/csv",
+            key=k.csv_dl,
+        )
+
+    func_type_for_edit = current_function(k)[1]
+    base_modbus = last_modbus_address if last_modbus_address is not None else 0
+    base_plc = last_plc_address if last_plc_address is not None else 0
+
+    # st.data_editor 渲染单个可虚拟滚动的表格并原生支持单元格编辑，
+    # 取代逐行 columns + 按钮；只有 coils / holding 的值列可编辑
+    writable = func_type_for_edit in WRITABLE_TYPES
+    page_vals = read_values[start:end]  # NumPy 切片为视图，不复制数据
+    is_register = page_vals.dtype != np.bool_
+    # 寄存器值列以 int64 交给编辑器：uint16 列写入越界值会在 pandas 内部抛出 TypeError
+    if is_register:
+        value_col = st.column_config.NumberColumn("值", min_value=0, max_value=65535, step=1)
+    else:
+        value_col = st.column_config.CheckboxColumn("值")
+    with st.form(k.edit_form):
+        # 必须传入 DataFrame：以 ndarray 为值的 dict 会被识别为键值字典，返回值不再是按列的表格
+        edited = st.data_editor(
+            pd.DataFrame(
+                {
+                    "PLC 地址": np.arange(base_plc + start, base_plc + end),
+                    "Modbus 地址": np.arange(base_modbus + start, base_modbus + end),
+                    "值": page_vals.astype(np.int64) if is_register else page_vals,
                 }
-                rerun()
+            ),
+            column_config={"值": value_col},
+            num_rows="fixed",
+            disabled=["PLC 地址", "Modbus 地址"] if writable else True,
+            use_container_width=True,
+            hide_index=True,
+            key=f"editor_{safe}_{base_modbus}_{start}",
+        )
+        submit_edit = st.form_submit_button("写入修改", disabled=not writable)
+
+    if not submit_edit:
+        return
+
+    # 与当前页缓存值整体比较，找出修改过的行
+    try:
+        new_vals = edited["值"].to_numpy(dtype=np.int64 if is_register else np.bool_)
+    except (TypeError, ValueError, OverflowError) as e:
+        st.error(f"写入失败: 无效的值（{e}）")
+        return
+    if is_register and ((new_vals < 0) | (new_vals > 65535)).any():
+        st.error("写入失败: 寄存器值必须在 0..65535 之间")
+        return
+    dirty = np.flatnonzero(new_vals != page_vals)
+    if not dirty.size:
+        st.info("没有修改的值")
+        return
+
+    try:
+        if not conn_meta.connected:
+            ok = conn_meta.connect()
+            if not ok:
+                st.error("与设备连接失败，无法写入")
+                raise ConnectionError("connect failed")
+        # 相邻地址的修改合并为一次多值写入（FC15/FC16），减少往返次数
+        for lo, hi in contiguous_runs(dirty):
+            run_vals = new_vals[lo:hi].astype(np.int64).tolist()
+            value = run_vals if len(run_vals) > 1 else run_vals[0]
+            conn_meta.write(type=func_type_for_edit, address=base_modbus + start + lo, value=value, allow_reconnect=True)
+            read_values[start + lo:start + hi] = new_vals[lo:hi]
+        st.success(f"写入成功（{dirty.size} 个值）")
+    except Exception as e:
+        st.error(f"写入失败: {e}")
+
+
+# 轮询与结果区放在同一个定时 fragment 中：每 REFRESH_INTERVAL_MS 只重跑这一部分，
+# 结果表内的分页 / 编辑操作也只重跑结果区，不再重跑所有连接面板
+@_fragment_every(REFRESH_INTERVAL_MS / 1000)
+def _results_section():
+    # 定时刷新只重跑本 fragment，自动连接的结果也要在这里收取；收到后整页重跑以更新面板状态
+    if harvest_connects():
+        rerun()
+    poll_devices()
+    if active_view in ("全部", "读取结果"):
+        st.markdown("## 读取结果（按连接分组）")
+        for cid in selected_ids:
+            _render_read_table(cid)
+
+
+_results_section()
+
+flush_rerun()
@@ -1,25 +1,309 @@
+import heapq
+import itertools
+import socket
 import threading
-import uuid
+import secrets
 import time
 import logging
-from typing import Optional, List, Any, Dict, Union
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Any, Callable, Dict, Tuple, Union
 
 try:
-    from pymodbus.client.sync import ModbusTcpClient
     from pymodbus.exceptions import ModbusIOException
 except Exception:
-    ModbusTcpClient = None
     ModbusIOException = Exception
 
+# the sync client pulls in most of pymodbus (tens of ms): imported on first connect by _client_class()
+ModbusTcpClient = None
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_CONNECT_TIMEOUT = 3.0
 DEFAULT_OPERATION_TIMEOUT = 3.0
 DEFAULT_RETRIES = 0
 DEFAULT_RETRY_BACKOFF = 0.5
+# retry delays double per attempt up to DEFAULT_MAX_BACKOFF, plus up to DEFAULT_RETRY_JITTER seconds of
+# random jitter so many connections recovering from the same outage do not retry in lockstep
+DEFAULT_MAX_BACKOFF = 5.0
+DEFAULT_RETRY_JITTER = 0.25
+# a background poller that hits an error waits at least this long before its next round
+POLL_FAILURE_BACKOFF = 5.0
+# worker threads shared by every background poller of one scheduler
+POLL_WORKERS = 8
+# connection ids: a random per-process prefix plus a counter, so creating a connection needs no entropy read
+_ID_PREFIX = secrets.token_hex(4)
+_id_counter = itertools.count(1)
+# identical reads within this many seconds are answered from the connection's response cache
+DEFAULT_CACHE_TTL = 0.2
+# TCP keepalive probing of idle sockets: first probe after KEEPALIVE_IDLE s, then every KEEPALIVE_INTERVAL s,
+# dropping the socket after KEEPALIVE_COUNT unanswered probes (~1 min to notice a silently dead peer)
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+
+# Function options: (display string, internal type, base address for PLC example)
+FUNCTION_OPTIONS = (
+    ("01 Coil Status (0x) - Coil", "coils", 1),
+    ("02 Input Status (1x) - Discrete Input", "discrete", 10001),
+    ("03 Holding Register (4x) - Holding", "holding", 40001),
+    ("04 Input Registers (3x) - Input Reg", "input", 30001),
+)
+FUNCTION_DISPLAY_LIST = tuple(opt[0] for opt in FUNCTION_OPTIONS)
+FUNCTION_BY_DISPLAY = {opt[0]: opt for opt in FUNCTION_OPTIONS}
+DEFAULT_FUNCTION = FUNCTION_OPTIONS[2]
+WRITABLE_TYPES = frozenset(("coils", "holding"))
+# values written to a coil as OFF; anything else is ON
+_COIL_FALSY = frozenset((0, "0", False, "false", "False"))
+
+# Modbus spec limits per request: 125 registers (FC03/FC04), 2000 bits (FC01/FC02)
+MAX_READ_COUNT = {"coils": 2000, "discrete": 2000, "holding": 125, "input": 125}
+# read type -> (client method, response attribute, label for errors)
+READ_DISPATCH = {
+    "coils": ("read_coils", "bits", "coils"),
+    "discrete": ("read_discrete_inputs", "bits", "discrete inputs"),
+    "holding": ("read_holding_registers", "registers", "holding registers"),
+    "input": ("read_input_registers", "registers", "input registers"),
+}
+# read_many may read up to this many unrequested addresses between two ranges to save a round-trip
+DEFAULT_MAX_READ_GAP = 8
+
+
+def _client_class():
+    global ModbusTcpClient
+    if ModbusTcpClient is None:
+        try:
+            from pymodbus.client.sync import ModbusTcpClient as client_cls
+        except Exception:
+            raise RuntimeError("pymodbus is not installed (pip install pymodbus)") from None
+        ModbusTcpClient = client_cls
+    return ModbusTcpClient
+
+
+def coalesce_reads(
+    requests: List[Tuple[int, int]], max_gap: int = 0, max_span: int = 125
+) -> List[Tuple[int, int, List[int]]]:
+    # merge (address, count) requests into as few contiguous spans as possible;
+    # returns [(start, count, [indexes into requests]), ...]
+    spans: List[Tuple[int, int, List[int]]] = []
+    for i in sorted(range(len(requests)), key=lambda k: int(requests[k][0])):
+        address, count = int(requests[i][0]), int(requests[i][1])
+        if spans:
+            start, span, members = spans[-1]
+            end = max(start + span, address + count)
+            if address - (start + span) <= max_gap and end - start <= max_span:
+                members.append(i)
+                spans[-1] = (start, end - start, members)
+                continue
+        spans.append((address, count, [i]))
+    return spans
+
+
+def _tune_socket(client) -> None:
+    # Modbus ADUs are tiny request/response pairs: disable Nagle so a request is not held back
+    # waiting for the previous delayed ACK, and enable keepalive so long-lived pollers notice dead peers
+    sock = getattr(client, "socket", None)
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # the kernel defaults wait ~2 h before the first probe; these options are not available on every platform
+        for opt, value in (
+            ("TCP_KEEPIDLE", KEEPALIVE_IDLE),
+            ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+            ("TCP_KEEPCNT", KEEPALIVE_COUNT),
+        ):
+            if hasattr(socket, opt):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, opt), value)
+    except (OSError, AttributeError):
+        logger.debug("could not set socket options", exc_info=True)
+
+
+def backoff_delay(
+    attempt: int, base: float, max_backoff: float = DEFAULT_MAX_BACKOFF, jitter: float = DEFAULT_RETRY_JITTER
+) -> float:
+    # capped exponential backoff with uniform jitter for the attempt-th failure (1-based)
+    return min(base * (2 ** (attempt - 1)), max_backoff) + random.uniform(0, jitter)
+
+
+class _Endpoint:
+    # one TCP client per (host, port), shared by every connection (e.g. clones) to that slave;
+    # many slaves accept only a single master socket
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.lock = threading.Lock()
+        # serializes request/response pairs on the shared socket (the sync client is not thread-safe)
+        self.io_lock = threading.Lock()
+        self.client: Optional["ModbusTcpClient"] = None
+        # bumped every time the socket is (re)opened; lets callers tell "the socket I saw fail" from a newer one
+        self.generation = 0
+        # the most recent client object, kept after a failed reopen so the next attempt can reuse it
+        self._last_client: Optional["ModbusTcpClient"] = None
+        self.timeout: Optional[float] = None
+        self.users = 0
+
+    def acquire(self, factory, timeout: float, stale_generation: Optional[int] = None) -> Tuple["ModbusTcpClient", int]:
+        # reuse the live socket unless it is the one the caller saw fail; otherwise reopen it.
+        # The client object itself is kept and reconnected in place (no new framer / address lookup)
+        # unless the requested timeout differs from the one it was built with.
+        # Lock order is lock -> io_lock; I/O paths never take lock while holding io_lock.
+        with self.lock:
+            if self.client is not None and self.generation != stale_generation:
+                return self.client, self.generation
+            client, self.client = self.client, None
+            if client is None:
+                client = self._last_client
+            # other connections may still be mid-request on the shared client: wait for them before closing it
+            with self.io_lock:
+                if client is not None:
+                    try:
+                        client.close()
+                    except Exception:
+                        logger.debug("error closing previous client", exc_info=True)
+                if client is None or self.timeout != timeout:
+                    client = factory()
+                    self.timeout = timeout
+                self._last_client = client
+                if not client.connect():
+                    raise ConnectionError("client.connect() returned False")
+                _tune_socket(client)
+            self.client = client
+            self.generation += 1
+            return client, self.generation
+
+    def attach(self) -> None:
+        with self.lock:
+            self.users += 1
+
+    def detach(self) -> None:
+        with self.lock:
+            self.users -= 1
+            if self.users > 0:
+                return
+            self.users = 0
+            client, self.client = self.client, None
+            self._last_client = None
+        if client is not None:
+            with self.io_lock:
+                try:
+                    client.close()
+                except Exception:
+                    logger.debug("error closing shared client", exc_info=True)
+
+
+class _PollScheduler:
+    # one thread keeps a heap of poll deadlines (monotonic clock) for all connections and hands due rounds
+    # to a small worker pool, instead of one sleeping thread per polled connection. A connection's next
+    # deadline is pushed only after its round finishes, so rounds of the same connection never overlap.
+    def __init__(self, max_workers: int = POLL_WORKERS):
+        self._cv = threading.Condition()
+        # (deadline, seq, interval seconds, job, stop event); job() runs one round and returns False on failure
+        self._heap: List[Tuple[float, int, float, Callable[[], bool], threading.Event]] = []
+        self._seq = 0
+        self._max_workers = max_workers
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+
+    def schedule(
+        self, interval: float, job: Callable[[], bool], stop: threading.Event, deadline: Optional[float] = None
+    ) -> None:
+        with self._cv:
+            if self._closed:
+                return
+            if self._thread is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="modbus-poll")
+                self._thread = threading.Thread(target=self._run, daemon=True, name="modbus-poll-scheduler")
+                self._thread.start()
+            self._seq += 1
+            heapq.heappush(self._heap, (time.monotonic() if deadline is None else deadline, self._seq, interval, job, stop))
+            self._cv.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while not self._heap and not self._closed:
+                    self._cv.wait()
+                if self._closed:
+                    return
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    # woken early by a new (possibly earlier) deadline: re-check the heap top
+                    self._cv.wait(delay)
+                    continue
+                entry = heapq.heappop(self._heap)
+                # submitted under the condition so nothing reaches the pool after shutdown()
+                if not entry[4].is_set():
+                    self._pool.submit(self._round, entry)
+
+    def _round(self, entry) -> None:
+        deadline, _, interval, job, stop = entry
+        ok = job()
+        if stop.is_set():
+            return
+        now = time.monotonic()
+        # keep a steady cadence; if a round overran its slot, start the next one right away
+        next_deadline = max(deadline + interval, now) if ok else now + max(interval, POLL_FAILURE_BACKOFF)
+        self.schedule(interval, job, stop, next_deadline)
+
+    def shutdown(self) -> None:
+        # drops pending rounds and lets the thread and pool exit; a round already running just finishes
+        with self._cv:
+            self._closed = True
+            self._heap.clear()
+            pool = self._pool
+            self._cv.notify()
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+_default_scheduler: Optional[_PollScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def _shared_scheduler() -> _PollScheduler:
+    # scheduler for connections created outside a ConnectionManager
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = _PollScheduler()
+        return _default_scheduler
 
 
 class ModbusConnection:
+    # fixed attribute set: no per-instance __dict__, cheaper attribute access on the read path
+    __slots__ = (
+        "id",
+        "host",
+        "port",
+        "unit",
+        "name",
+        "_lock",
+        "_endpoint",
+        "_io_lock",
+        "_attached",
+        "client",
+        "_client_generation",
+        "_read_fns",
+        "connected",
+        "last_read",
+        "_poll_config",
+        "_poll_stop",
+        "_scheduler",
+        "last_poll",
+        "_last_connect_time",
+        "connect_timeout",
+        "operation_timeout",
+        "retries",
+        "retry_backoff",
+        "max_backoff",
+        "jitter",
+        "cache_ttl",
+        "_resp_cache",
+    )
+
     def __init__(
         self,
         host: str,
@@ -30,46 +314,58 @@ class ModbusConnection:
         operation_timeout: float = DEFAULT_OPERATION_TIMEOUT,
         retries: int = DEFAULT_RETRIES,
         retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        jitter: float = DEFAULT_RETRY_JITTER,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        endpoint: Optional[_Endpoint] = None,
+        scheduler: Optional[_PollScheduler] = None,
     ):
-        self.id = str(uuid.uuid4())
+        # 16 hex chars: short and already safe to embed in widget / session_state keys
+        self.id = f"{_ID_PREFIX}{next(_id_counter):08x}"
         self.host = host
         self.port = int(port)
         self.unit = int(unit)
         self.name = name or f"{host}:{port}"
         self._lock = threading.Lock()
+        self._endpoint = endpoint or _Endpoint(self.host, self.port)
+        self._io_lock = self._endpoint.io_lock
+        self._attached = False
         self.client: Optional["ModbusTcpClient"] = None
+        self._client_generation = 0
+        # (client, {type: (bound read method, response attribute, label)}) for the client last read from
+        self._read_fns: Tuple[Any, Dict[str, Tuple[Any, str, str]]] = (None, {})
         self.connected: bool = False
         self.last_read: Optional[List[Any]] = None
+        # background poller: (interval_ms, spec) it runs with, its stop event, and its latest (monotonic_ns, spec, results)
+        self._poll_config: Optional[Tuple[int, Tuple[Tuple[str, int, int], ...]]] = None
+        self._poll_stop: Optional[threading.Event] = None
+        self._scheduler = scheduler
+        self.last_poll: Optional[Tuple[int, Tuple[Tuple[str, int, int], ...], List[List[Any]]]] = None
         self._last_connect_time: Optional[float] = None
 
         self.connect_timeout = float(connect_timeout)
         self.operation_timeout = float(operation_timeout)
         self.retries = int(retries)
         self.retry_backoff = float(retry_backoff)
+        self.max_backoff = float(max_backoff)
+        self.jitter = float(jitter)
+        self.cache_ttl = float(cache_ttl)
+        # (type, address, count) -> (monotonic time, socket generation, values)
+        self._resp_cache: Dict[Tuple[str, int, int], Tuple[float, int, List[Any]]] = {}
 
     def _create_client(self, timeout: float):
-        if ModbusTcpClient is None:
-            raise RuntimeError("pymodbus is not installed (pip install pymodbus)")
-        return ModbusTcpClient(self.host, port=self.port, timeout=timeout)
+        return _client_class()(self.host, port=self.port, timeout=timeout)
 
     def connect(self, timeout: Optional[float] = None) -> bool:
-        if ModbusTcpClient is None:
-            raise RuntimeError("pymodbus is not installed (pip install pymodbus)")
+        _client_class()
 
         effective_timeout = float(timeout) if timeout is not None else self.operation_timeout
 
-        old_client = None
+        # the endpoint only reopens the socket if it is the one this connection was using
         with self._lock:
-            if self.client:
-                old_client = self.client
-                self.client = None
-                self.connected = False
-
-        if old_client:
-            try:
-                old_client.close()
-            except Exception:
-                logger.debug("error closing previous client", exc_info=True)
+            stale_generation = self._client_generation if self.client is not None else None
+            self.client = None
+            self.connected = False
 
         attempt = 0
         max_attempts = 1 + max(0, self.retries)
@@ -77,14 +373,18 @@ class ModbusConnection:
         while attempt < max_attempts:
             attempt += 1
             try:
-                new_client = self._create_client(effective_timeout)
-                ok = new_client.connect()
-                if not ok:
-                    raise ConnectionError("client.connect() returned False")
+                new_client, generation = self._endpoint.acquire(
+                    lambda: self._create_client(effective_timeout), effective_timeout, stale_generation
+                )
                 with self._lock:
                     self.client = new_client
+                    self._client_generation = generation
                     self.connected = True
                     self._last_connect_time = time.time()
+                    attach = not self._attached
+                    self._attached = True
+                if attach:
+                    self._endpoint.attach()
                 logger.info("connected to %s:%s (attempt %s)", self.host, self.port, attempt)
                 return True
             except Exception as e:
@@ -96,80 +396,92 @@ class ModbusConnection:
                     self.host,
                     self.port,
                     e,
-                    exc_info=True,
                 )
                 if attempt < max_attempts:
-                    time.sleep(self.retry_backoff * attempt)
+                    time.sleep(backoff_delay(attempt, self.retry_backoff, self.max_backoff, self.jitter))
 
         with self._lock:
             self.client = None
             self.connected = False
-        logger.error("all connect attempts failed for %s:%s: %s", self.host, self.port, last_exc)
+        # the traceback is formatted once, for the final failure only
+        logger.error("all connect attempts failed for %s:%s: %s", self.host, self.port, last_exc, exc_info=last_exc)
         return False
 
     def close(self) -> None:
+        self.stop_poll()
+        # the shared socket is closed once the last connection using it lets go
         with self._lock:
-            client = self.client
             self.client = None
+            self._read_fns = (None, {})
+            self._resp_cache.clear()
             self.connected = False
-
-        if client:
-            try:
-                client.close()
-            except Exception:
-                logger.debug("error closing client during close()", exc_info=True)
-
-    def _single_read(self, type_: str, address: int, count: int) -> List[Any]:
+            detach = self._attached
+            self._attached = False
+
+        if detach:
+            self._endpoint.detach()
+
+    def _current_client(self):
+        # another connection on the same endpoint may have reopened the shared socket since our last call
+        endpoint = self._endpoint
+        if endpoint.generation == self._client_generation:
+            # common case, no lock: attribute reads are atomic and the pair below is only written under the lock
+            return self.client
         with self._lock:
-            client = self.client
+            if self.client is not None and endpoint.client is not None and endpoint.generation != self._client_generation:
+                self.client = endpoint.client
+                self._client_generation = endpoint.generation
+            return self.client
 
+    def _single_read(self, client, type_: str, address: int, count: int) -> List[Any]:
         if client is None:
             raise ConnectionError("No underlying client available")
 
         address = int(address)
         count = int(count)
 
+        bound_client, fns = self._read_fns
+        if bound_client is not client:
+            # bind the read methods once per client object instead of a getattr on every request
+            fns = {t: (getattr(client, method), attr, label) for t, (method, attr, label) in READ_DISPATCH.items()}
+            self._read_fns = (client, fns)
         try:
-            if type_ == "coils":
-                rr = client.read_coils(address, count, unit=self.unit)
-                if rr is None:
-                    raise ModbusIOException("No response")
-                if hasattr(rr, "bits"):
-                    return rr.bits[:count]
-                raise ModbusIOException("Unexpected response for coils")
-
-            if type_ == "discrete":
-                rr = client.read_discrete_inputs(address, count, unit=self.unit)
-                if rr is None:
-                    raise ModbusIOException("No response")
-                if hasattr(rr, "bits"):
-                    return rr.bits[:count]
-                raise ModbusIOException("Unexpected response for discrete inputs")
-
-            if type_ == "holding":
-                rr = client.read_holding_registers(address, count, unit=self.unit)
-                if rr is None:
-                    raise ModbusIOException("No response")
-                if hasattr(rr, "registers"):
-                    return rr.registers[:count]
-                raise ModbusIOException("Unexpected response for holding registers")
-
-            if type_ == "input":
-                rr = client.read_input_registers(address, count, unit=self.unit)
-                if rr is None:
-                    raise ModbusIOException("No response")
-                if hasattr(rr, "registers"):
-                    return rr.registers[:count]
-                raise ModbusIOException("Unexpected response for input registers")
-
-            raise ValueError(f"Unknown read type: {type_}")
-        except Exception:
-            raise
-
-    def read(self, type: str, address: int, count: int, allow_reconnect: bool = False):
+            fn, attr, label = fns[type_]
+        except KeyError:
+            raise ValueError(f"Unknown read type: {type_}") from None
+
+        rr = fn(address, count, unit=self.unit)
+        if rr is None:
+            raise ModbusIOException("No response")
+        values = getattr(rr, attr, None)
+        if values is None:
+            raise ModbusIOException(f"Unexpected response for {label}")
+        # registers come back exactly `count` long and bits padded to a whole byte: only slice when needed;
+        # callers must not mutate the returned list (it may be the response's own list)
+        return values if len(values) == count else values[:count]
+
+    def _invalidate_cache(self, type_: str, address: int, count: int) -> None:
         with self._lock:
-            client = self.client
-            connected = self.connected
+            for key in [k for k in self._resp_cache if k[0] == type_ and k[1] < address + count and address < k[1] + k[2]]:
+                del self._resp_cache[key]
+            # force the next poll round to publish even if the device reports the pre-write values again
+            self.last_poll = None
+
+    def read(self, type: str, address: int, count: int, allow_reconnect: bool = False, use_cache: bool = True):
+        cache_key = (type, int(address), int(count))
+        # lock-free snapshot: single attribute / dict reads are atomic; connect() and close() update them under the lock
+        client, connected = self.client, self.connected
+        # only a live connection answers from the cache, and only with values read over the current socket:
+        # a closed / dropped / reopened connection must not serve pre-drop values as if they were live
+        if use_cache and connected and client is not None:
+            generation = self._client_generation
+            cached = self._resp_cache.get(cache_key)
+            if (
+                cached is not None
+                and cached[1] == generation == self._endpoint.generation
+                and time.monotonic() - cached[0] < self.cache_ttl
+            ):
+                return cached[2]
 
         if not connected or client is None:
             if not allow_reconnect:
@@ -178,30 +490,162 @@ class ModbusConnection:
             if not ok:
                 raise ConnectionError(f"Auto-reconnect to {self.host}:{self.port} failed")
 
-        with self._lock:
-            client = self.client
+        client = self._current_client()
+        generation = self._client_generation
 
         if client is None:
             raise ConnectionError(f"No client available for {self.host}:{self.port}")
 
+        # state lock is only held to snapshot/update attributes; the blocking request runs under the endpoint's I/O lock
         try:
-            result = self._single_read(type, address, count)
+            max_count = MAX_READ_COUNT.get(type, 125)
+            with self._io_lock:
+                if count <= max_count:
+                    result = self._single_read(client, type, address, count)
+                else:
+                    # over the per-request limit: back-to-back full-size requests under one I/O lock hold
+                    address, count = int(address), int(count)
+                    result = []
+                    for offset in range(0, count, max_count):
+                        result.extend(self._single_read(client, type, address + offset, min(max_count, count - offset)))
             with self._lock:
                 self.last_read = result
+                if self.cache_ttl > 0:
+                    if len(self._resp_cache) >= 64:
+                        self._resp_cache.clear()
+                    self._resp_cache[cache_key] = (time.monotonic(), generation, result)
             return result
-        except ModbusIOException:
-            with self._lock:
-                self.connected = False
-            raise
         except Exception:
-            with self._lock:
-                self.connected = False
+            self.connected = False
             raise
 
-    def write(self, type: str, address: int, value: Union[int, List[int], List[bool]], allow_reconnect: bool = False):
+    def read_many(
+        self,
+        type: str,
+        ranges: List[Tuple[int, int]],
+        allow_reconnect: bool = False,
+        max_gap: int = DEFAULT_MAX_READ_GAP,
+    ) -> List[List[Any]]:
+        results: List[List[Any]] = [[] for _ in ranges]
+        max_span = MAX_READ_COUNT.get(type, 125)
+        for start, span, members in coalesce_reads(ranges, max_gap=max_gap, max_span=max_span):
+            values = self.read(type, start, span, allow_reconnect=allow_reconnect)
+            for i in members:
+                offset = int(ranges[i][0]) - start
+                results[i] = values[offset:offset + int(ranges[i][1])]
+        return results
+
+    @property
+    def poll_config(self) -> Optional[Tuple[int, Tuple[Tuple[str, int, int], ...]]]:
+        return self._poll_config
+
+    def start_poll(self, interval_ms: int, spec: List[Tuple[str, int, int]]) -> None:
+        # (re)start background polling of every (type, address, count) in spec each interval_ms on the
+        # shared scheduler; results land in last_poll, so UI reads become a memory load
+        config = (int(interval_ms), tuple((str(t), int(a), int(c)) for t, a, c in spec))
+        reader = self.compile_reader(config[1])
+        self.stop_poll()
+        stop = threading.Event()
+        with self._lock:
+            self._poll_config = config
+            self._poll_stop = stop
+        (self._scheduler or _shared_scheduler()).schedule(
+            config[0] / 1000.0, lambda: self._poll_once(reader, config[1], stop), stop
+        )
+
+    def stop_poll(self) -> None:
+        with self._lock:
+            stop, self._poll_stop = self._poll_stop, None
+            self._poll_config = None
+        if stop is not None:
+            stop.set()
+
+    def compile_reader(self, spec: Tuple[Tuple[str, int, int], ...]) -> Callable[[], List[List[Any]]]:
+        # resolve the type grouping and coalesced request plan for a fixed spec once; the returned
+        # reader() only issues the planned reads and slices the results back per spec entry
+        by_type: Dict[str, List[int]] = {}
+        for i, (type_, _, _) in enumerate(spec):
+            if type_ not in READ_DISPATCH:
+                raise ValueError(f"Unknown read type: {type_}")
+            by_type.setdefault(type_, []).append(i)
+        plan: List[Tuple[str, int, int, Tuple[Tuple[int, int, int], ...]]] = []
+        for type_, idxs in by_type.items():
+            ranges = [spec[i][1:] for i in idxs]
+            for start, span, members in coalesce_reads(ranges, DEFAULT_MAX_READ_GAP, MAX_READ_COUNT[type_]):
+                slots = tuple((idxs[m], int(ranges[m][0]) - start, int(ranges[m][1])) for m in members)
+                plan.append((type_, start, span, slots))
+        size = len(spec)
+        read = self.read
+
+        def reader() -> List[List[Any]]:
+            results: List[List[Any]] = [[] for _ in range(size)]
+            for type_, start, span, slots in plan:
+                values = read(type_, start, span, allow_reconnect=True, use_cache=False)
+                for i, offset, count in slots:
+                    results[i] = values[offset:offset + count]
+            return results
+
+        return reader
+
+    def _poll_once(self, reader: Callable[[], List[List[Any]]], spec, stop: threading.Event) -> bool:
+        # one polling round, run on a scheduler worker; returns False if any read failed
+        try:
+            results = reader()
+        except Exception as e:
+            logger.debug("poll of %s:%s failed: %s", self.host, self.port, e)
+            return False
         with self._lock:
-            client = self.client
-            connected = self.connected
+            if self._poll_stop is stop:
+                previous = self.last_poll
+                # unchanged values keep the previous stamp, so consumers see no new round and skip their work
+                if previous is None or previous[1] != spec or previous[2] != results:
+                    # monotonic_ns stamp: an int the UI only compares for "is this a new round"
+                    self.last_poll = (time.monotonic_ns(), spec, results)
+        return True
+
+    def _single_write(self, client, type_: str, address: int, value: Union[int, List[int], List[bool]]):
+        if hasattr(value, "tolist"):
+            # NumPy arrays / scalars: one C-level conversion to Python ints
+            value = value.tolist()
+        if type_ == "coils":
+            if isinstance(value, (list, tuple)):
+                coils = [v not in _COIL_FALSY for v in value]
+                rr = client.write_coils(address, coils, unit=self.unit)
+                if rr is None:
+                    raise ModbusIOException("No response writing coils")
+                return rr
+            else:
+                val_bool = bool(value)
+                rr = client.write_coil(address, val_bool, unit=self.unit)
+                if rr is None:
+                    raise ModbusIOException("No response writing coil")
+                return rr
+
+        if type_ == "holding":
+            if isinstance(value, (list, tuple)):
+                regs = list(map(int, value))
+                if hasattr(client, "write_registers"):
+                    rr = client.write_registers(address, regs, unit=self.unit)
+                    if rr is None:
+                        raise ModbusIOException("No response writing registers")
+                    return rr
+                else:
+                    last_rr = None
+                    for idx, rv in enumerate(regs):
+                        last_rr = client.write_register(address + idx, int(rv), unit=self.unit)
+                        if last_rr is None:
+                            raise ModbusIOException("No response writing register")
+                    return last_rr
+            else:
+                rr = client.write_register(address, int(value), unit=self.unit)
+                if rr is None:
+                    raise ModbusIOException("No response writing register")
+                return rr
+
+        raise ValueError(f"Write not supported for type: {type_}")
+
+    def write(self, type: str, address: int, value: Union[int, List[int], List[bool]], allow_reconnect: bool = False):
+        client, connected = self.client, self.connected
 
         if not connected or client is None:
             if not allow_reconnect:
@@ -210,8 +654,7 @@ class ModbusConnection:
             if not ok:
                 raise ConnectionError(f"Auto-reconnect to {self.host}:{self.port} failed")
 
-        with self._lock:
-            client = self.client
+        client = self._current_client()
 
         if client is None:
             raise ConnectionError(f"No client available for {self.host}:{self.port}")
@@ -219,52 +662,28 @@ class ModbusConnection:
         address = int(address)
 
         try:
-            if type == "coils":
-                if isinstance(value, (list, tuple)):
-                    coils = [True if v not in (0, "0", False, "false", "False") else False for v in value]
-                    rr = client.write_coils(address, coils, unit=self.unit)
-                    if rr is None:
-                        raise ModbusIOException("No response writing coils")
-                    return rr
-                else:
-                    val_bool = bool(value)
-                    rr = client.write_coil(address, val_bool, unit=self.unit)
-                    if rr is None:
-                        raise ModbusIOException("No response writing coil")
-                    return rr
-
-            if type == "holding":
-                if isinstance(value, (list, tuple)):
-                    regs = [int(v) for v in value]
-                    if hasattr(client, "write_registers"):
-                        rr = client.write_registers(address, regs, unit=self.unit)
-                        if rr is None:
-                            raise ModbusIOException("No response writing registers")
-                        return rr
-                    else:
-                        last_rr = None
-                        for idx, rv in enumerate(regs):
-                            last_rr = client.write_register(address + idx, int(rv), unit=self.unit)
-                            if last_rr is None:
-                                raise ModbusIOException("No response writing register")
-                        return last_rr
-                else:
-                    rr = client.write_register(address, int(value), unit=self.unit)
-                    if rr is None:
-                        raise ModbusIOException("No response writing register")
-                    return rr
-
-            raise ValueError(f"Write not supported for type: {type}")
+            with self._io_lock:
+                return self._single_write(client, type, address, value)
         except Exception:
-            with self._lock:
-                self.connected = False
+            self.connected = False
             raise
+        finally:
+            self._invalidate_cache(type, address, len(value) if hasattr(value, "__len__") else 1)
 
 
 class ConnectionManager:
     def __init__(self):
+        # copy-on-write: writers build a new dict under the lock and swap it in, so readers
+        # (get / list_connections) only need one lock-free attribute read to get a consistent map
         self._conns: Dict[str, ModbusConnection] = {}
+        self._endpoints: Dict[Tuple[str, int], _Endpoint] = {}
+        self._scheduler = _PollScheduler()
         self._lock = threading.Lock()
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
 
     def create_connection(
         self,
@@ -277,6 +696,10 @@ class ConnectionManager:
         retries: int = DEFAULT_RETRIES,
     ) -> ModbusConnection:
         with self._lock:
+            key = (host, int(port))
+            endpoint = self._endpoints.get(key)
+            if endpoint is None:
+                endpoint = self._endpoints[key] = _Endpoint(host, int(port))
             conn = ModbusConnection(
                 host=host,
                 port=port,
@@ -285,38 +708,62 @@ class ConnectionManager:
                 connect_timeout=connect_timeout,
                 operation_timeout=operation_timeout,
                 retries=retries,
+                endpoint=endpoint,
+                scheduler=self._scheduler,
             )
-            self._conns[conn.id] = conn
+            conns = dict(self._conns)
+            conns[conn.id] = conn
+            self._conns = conns
+            self._version += 1
             return conn
 
     def list_connections(self) -> List[Dict[str, Any]]:
-        with self._lock:
-            out = []
-            for c in self._conns.values():
-                out.append({
-                    "id": c.id,
-                    "name": c.name,
-                    "host": c.host,
-                    "port": c.port,
-                    "unit": c.unit,
-                    "connected": c.connected,
-                    "connect_timeout": c.connect_timeout,
-                    "operation_timeout": c.operation_timeout,
-                    "retries": c.retries,
-                })
-            return out
+        conns = self._conns.values()
+        return [
+            {
+                "id": c.id,
+                "name": c.name,
+                "host": c.host,
+                "port": c.port,
+                "unit": c.unit,
+                "connected": c.connected,
+                "connect_timeout": c.connect_timeout,
+                "operation_timeout": c.operation_timeout,
+                "retries": c.retries,
+            }
+            for c in conns
+        ]
 
     def get(self, conn_id: str) -> Optional[ModbusConnection]:
         return self._conns.get(conn_id)
 
     def remove(self, conn_id: str) -> None:
         with self._lock:
-            c = self._conns.pop(conn_id, None)
+            c = self._conns.get(conn_id)
+            if c:
+                conns = dict(self._conns)
+                del conns[conn_id]
+                self._conns = conns
+                self._version += 1
+                key = (c.host, c.port)
+                if not any((o.host, o.port) == key for o in self._conns.values()):
+                    self._endpoints.pop(key, None)
         if c:
             try:
                 c.close()
             except Exception:
                 pass
 
-
-manager = ConnectionManager()
+    def close_all(self) -> None:
+        # for a manager being discarded: closes every connection (and so every shared socket) and the poll scheduler
+        with self._lock:
+            conns = list(self._conns.values())
+            self._conns = {}
+            self._endpoints = {}
+            self._version += 1
+        for c in conns:
+            try:
+                c.close()
+            except Exception:
+                pass
+        self._scheduler.shutdown()
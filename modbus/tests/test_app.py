@@ -0,0 +1,175 @@
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("pymodbus")
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusServerContext, ModbusSlaveContext
+from pymodbus.server.sync import ModbusTcpServer
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(APP_DIR, "app.py")
+sys.path.insert(0, APP_DIR)
+
+from modbus_manager import ModbusConnection  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_manager():
+    # the app keeps its ConnectionManager in st.cache_resource, which outlives a single AppTest
+    st.cache_resource.clear()
+    yield
+    st.cache_resource.clear()
+
+
+@pytest.fixture
+def modbus_server():
+    # local slave (pymodbus 2.x contexts are 1-based): holding register at Modbus address n holds n + 1
+    store = ModbusSlaveContext(
+        di=ModbusSequentialDataBlock(0, [0] * 200),
+        co=ModbusSequentialDataBlock(0, [0] * 200),
+        hr=ModbusSequentialDataBlock(0, list(range(200))),
+        ir=ModbusSequentialDataBlock(0, list(range(200))),
+    )
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = ModbusTcpServer(
+        ModbusServerContext(slaves=store, single=True), address=("127.0.0.1", port), allow_reuse_address=True
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    time.sleep(0.2)
+    yield port, store
+    server.shutdown()
+    server.server_close()
+
+
+def _connected_app(port):
+    at = AppTest.from_file(APP_PATH, default_timeout=30)
+    at.run()
+    at.sidebar.text_input[0].set_value("127.0.0.1")
+    at.sidebar.number_input[0].set_value(port)
+    at.sidebar.button[0].click()
+    at.run()
+    # the auto-connect result is picked up within the same run, without waiting for another one
+    assert "正在自动连接..." not in [i.value for i in at.info]
+    [b for b in at.button if b.label == "读取"][0].click()
+    at.run()
+    assert not at.exception, at.exception
+    return at
+
+
+def _edit_cells(at, editor, edited_rows):
+    # AppTest has no data_editor API: inject the editor's widget state the way the frontend sends it
+    tree = at._tree
+    widget_states = tree.get_widget_states
+
+    def with_edits():
+        states = widget_states()
+        ws = states.widgets.add()
+        ws.id = editor.proto.id
+        ws.string_value = json.dumps({"edited_rows": edited_rows, "added_rows": [], "deleted_rows": []})
+        return states
+
+    tree.get_widget_states = with_edits
+
+
+def test_edit_form_writes_changed_cells(modbus_server):
+    port, store = modbus_server
+    at = _connected_app(port)
+    editor = [e for e in at.main if type(e).__name__ == "Dataframe"][0]
+
+    _edit_cells(at, editor, {"1": {"值": 1234}})
+    [b for b in at.button if b.label == "写入修改"][0].click()
+    at.run()
+
+    assert not at.exception, at.exception
+    assert not [e.value for e in at.error]
+    # row 1 is Modbus address 1; its neighbours are untouched
+    assert store.getValues(3, 0, 3) == [1, 1234, 3]
+
+
+def test_batch_write_diffs_against_device_not_cache(modbus_server):
+    port, store = modbus_server
+    at = _connected_app(port)
+    # another master changes register 0 after our read: the cached 1 is now stale
+    store.setValues(3, 0, [77])
+
+    [b for b in at.button if b.label == "写入"][0].click()
+    at.run()
+    at.text_area[0].set_value("1,2,30,4")
+    [b for b in at.button if b.label == "写入确认"][0].click()
+    at.run()
+
+    assert not at.exception, at.exception
+    assert not [e.value for e in at.error]
+    assert store.getValues(3, 0, 4) == [1, 2, 30, 4]
+
+
+def test_edit_form_rejects_out_of_range_register(modbus_server):
+    port, store = modbus_server
+    at = _connected_app(port)
+    editor = [e for e in at.main if type(e).__name__ == "Dataframe"][0]
+
+    # beyond uint16: must be rejected with a message, not raise inside pandas
+    _edit_cells(at, editor, {"1": {"值": 70000}})
+    [b for b in at.button if b.label == "写入修改"][0].click()
+    at.run()
+
+    assert not at.exception, at.exception
+    assert [e.value for e in at.error]
+    assert store.getValues(3, 0, 3) == [1, 2, 3]
+
+
+def test_hidden_panels_keep_their_config(modbus_server):
+    port, _ = modbus_server
+    at = _connected_app(port)
+    at.number_input(key=[n.key for n in at.number_input if (n.key or "").startswith("count_")][0]).set_value(8)
+    at.run()
+    cid = next(iter(at.session_state["read_state"]))
+
+    # panels are not rendered in this view, so their widgets do not exist on these runs
+    at.radio(key="active_view").set_value("读取结果")
+    at.run()
+    at.session_state["_last_poll"] = 0.0  # skip the poll throttle so this run reads with the panel config
+    at.run()
+    time.sleep(0.3)  # the poll read finishes in the background and is picked up on the next run
+    at.run()
+    assert not at.exception, at.exception
+    assert len(at.session_state["read_state"][cid]["values"]) == 8
+
+    at.radio(key="active_view").set_value("全部")
+    at.run()
+    assert [n.value for n in at.number_input if (n.key or "").startswith("count_")] == [8]
+
+
+def test_new_session_keeps_running_poll(modbus_server, monkeypatch):
+    port, _ = modbus_server
+    stopped = []
+    stop_poll = ModbusConnection.stop_poll
+    monkeypatch.setattr(ModbusConnection, "stop_poll", lambda self: stopped.append(self.id) or stop_poll(self))
+    at = _connected_app(port)
+    at.number_input(key=[n.key for n in at.number_input if (n.key or "").startswith("poll_ms_")][0]).set_value(500)
+    at.run()
+    cid = next(iter(at.session_state["read_state"]))
+    poll_key = f"poll_ms_{cid}"
+    stopped.clear()
+
+    # a second tab (or a reload) starts with fresh widget state but shares the connection and its poller
+    other = AppTest.from_file(APP_PATH, default_timeout=30)
+    other.run()
+    assert not other.exception, other.exception
+    assert other.number_input(key=poll_key).value == 500
+    assert not stopped
+
+    # turning it off from a session that shows the poll still stops it
+    other.number_input(key=poll_key).set_value(0)
+    other.run()
+    assert not other.exception, other.exception
+    assert stopped == [cid]
@@ -0,0 +1,168 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modbus_manager as mm  # noqa: E402
+
+
+class _Response:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeClient:
+    # in-memory slave: registers hold their own address, coils are all off; every request is logged
+    def __init__(self, host, port=502, timeout=3, **kwargs):
+        self.socket = None
+        self.requests = []
+        self.connects = 0
+        self.closes = 0
+
+    def connect(self):
+        self.connects += 1
+        return True
+
+    def close(self):
+        self.closes += 1
+
+    def _registers(self, type_, address, count):
+        self.requests.append((type_, address, count))
+        return _Response(registers=list(range(address, address + count)))
+
+    def _bits(self, type_, address, count):
+        self.requests.append((type_, address, count))
+        # bit reads are padded to whole bytes, like a real response
+        return _Response(bits=[False] * ((count + 7) & ~7))
+
+    def read_holding_registers(self, address, count, unit=1):
+        return self._registers("holding", address, count)
+
+    def read_input_registers(self, address, count, unit=1):
+        return self._registers("input", address, count)
+
+    def read_coils(self, address, count, unit=1):
+        return self._bits("coils", address, count)
+
+    def read_discrete_inputs(self, address, count, unit=1):
+        return self._bits("discrete", address, count)
+
+
+@pytest.fixture(autouse=True)
+def fake_client(monkeypatch):
+    monkeypatch.setattr(mm, "ModbusTcpClient", FakeClient)
+
+
+def test_coalesce_reads_merges_overlaps_and_adjacent_ranges():
+    # request order is kept in the member indexes, spans come out sorted by address
+    assert mm.coalesce_reads([(10, 4), (0, 5), (12, 6), (5, 2)]) == [(0, 7, [1, 3]), (10, 8, [0, 2])]
+
+
+def test_coalesce_reads_bridges_gaps_up_to_max_gap():
+    ranges = [(0, 2), (5, 2), (20, 1)]
+    assert mm.coalesce_reads(ranges) == [(0, 2, [0]), (5, 2, [1]), (20, 1, [2])]
+    assert mm.coalesce_reads(ranges, max_gap=3) == [(0, 7, [0, 1]), (20, 1, [2])]
+
+
+def test_coalesce_reads_respects_max_span():
+    assert mm.coalesce_reads([(0, 100), (100, 100)], max_span=125) == [(0, 100, [0]), (100, 100, [1])]
+    assert mm.coalesce_reads([(0, 100), (100, 100)], max_span=200) == [(0, 200, [0, 1])]
+
+
+def test_read_above_the_request_limit_is_split():
+    conn = mm.ModbusConnection("10.0.0.1", cache_ttl=0)
+    assert conn.connect()
+
+    values = conn.read("holding", 0, 300)
+
+    assert values == list(range(300))
+    assert conn.client.requests == [("holding", 0, 125), ("holding", 125, 125), ("holding", 250, 50)]
+    assert conn.read("coils", 0, 10) == [False] * 10
+
+
+def test_shared_endpoint_closes_its_socket_with_the_last_user():
+    manager = mm.ConnectionManager()
+    a = manager.create_connection("10.0.0.2", unit=1)
+    b = manager.create_connection("10.0.0.2", unit=2)
+    assert a.connect() and b.connect()
+    client = a.client
+    assert b.client is client and client.connects == 1
+
+    manager.remove(a.id)
+    assert client.closes == 0 and b.read("holding", 3, 1) == [3]
+
+    manager.remove(b.id)
+    assert client.closes == 1
+    assert not manager._endpoints
+
+
+def test_close_all_closes_every_connection():
+    manager = mm.ConnectionManager()
+    conns = [manager.create_connection(host) for host in ("10.0.0.3", "10.0.0.4")]
+    for conn in conns:
+        assert conn.connect()
+    clients = [conn.client for conn in conns]
+
+    manager.close_all()
+
+    assert [client.closes for client in clients] == [1, 1]
+    assert not manager.list_connections()
+
+
+def _round_after(job_result, interval=0.1):
+    scheduler = mm._PollScheduler()
+    pushed = []
+    scheduler.schedule = lambda *args: pushed.append(args)
+    stop = threading.Event()
+    deadline = time.monotonic()
+    scheduler._round((deadline, 0, interval, lambda: job_result, stop))
+    return deadline, pushed
+
+
+def test_poll_round_keeps_cadence_on_success():
+    deadline, pushed = _round_after(True)
+    ((interval, _, _, next_deadline),) = pushed
+    assert interval == 0.1
+    assert next_deadline == deadline + 0.1
+
+
+def test_poll_round_backs_off_after_failure():
+    deadline, pushed = _round_after(False)
+    ((_, _, _, next_deadline),) = pushed
+    assert next_deadline >= deadline + mm.POLL_FAILURE_BACKOFF
+
+
+def test_stopped_poll_is_not_rescheduled():
+    scheduler = mm._PollScheduler()
+    runs = []
+    stop = threading.Event()
+
+    def job():
+        runs.append(1)
+        stop.set()
+        return True
+
+    scheduler.schedule(0.01, job, stop)
+    time.sleep(0.1)
+    scheduler.shutdown()
+    assert runs == [1]
+
+
+def test_background_poll_publishes_results_until_stopped():
+    conn = mm.ModbusConnection("10.0.0.5", cache_ttl=0, scheduler=mm._PollScheduler())
+    assert conn.connect()
+
+    conn.start_poll(10, [("holding", 5, 2)])
+    time.sleep(0.1)
+    assert conn.last_poll is not None and conn.last_poll[2] == [[5, 6]]
+
+    conn.stop_poll()
+    time.sleep(0.05)
+    count = len(conn.client.requests)
+    time.sleep(0.05)
+    assert conn.poll_config is None
+    assert len(conn.client.requests) == count